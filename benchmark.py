@@ -0,0 +1,291 @@
+import argparse
+import json
+import math
+import sys
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+
+from face_tracking import FaceTracker
+from input_dispatch import DryRunBackend, PointerSimulationBackend, PyAutoGuiBackend
+from recording import ReplayLandmarkDetector, ReplaySource, SessionRecorder
+
+
+def latency_summary(samples, elapsed):
+    samples = np.array(samples) * 1000
+    return {
+        'frames': len(samples),
+        'fps': len(samples) / elapsed if elapsed > 0 else 0.0,
+        'latency_ms_p50': float(np.percentile(samples, 50)),
+        'latency_ms_p95': float(np.percentile(samples, 95)),
+        'latency_ms_p99': float(np.percentile(samples, 99)),
+    }
+
+
+def record(args):
+    tracker = FaceTracker()
+    tracker.input_backend = DryRunBackend()
+    tracker.preview_mode = 'window' if args.preview else 'off'
+    tracker.max_frames = args.frames
+    tracker.recorder = SessionRecorder(args.path, max_frames=args.frames,
+                                       record_frames=not args.landmarks_only, record_landmarks=True)
+    tracker.run()
+    print(f"Recorded {tracker.recorder.count} frames to {args.path}")
+
+
+def replay(args):
+    source = ReplaySource(args.path, realtime=args.realtime)
+    if not source.count:
+        print(f"No frames replayed from {args.path}")
+        return 1
+    tracker = FaceTracker()
+    tracker.frame_source = source
+    tracker.input_backend = DryRunBackend()
+    tracker.preview_mode = 'off'
+    tracker.overlay.enabled = False
+    tracker.latency_samples = deque()
+    if args.landmarks_only:
+        tracker.detector = ReplayLandmarkDetector(source)
+    elif not source.meta['has_frames']:
+        print(f"{args.path} was recorded without frames; replay it with --landmarks-only")
+        return 1
+
+    start = time.perf_counter()
+    tracker.run()
+    elapsed = time.perf_counter() - start
+    if tracker.error is not None:
+        print(f"Replay of {args.path} failed: {tracker.error}")
+        return 1
+
+    if not tracker.latency_samples:
+        print(f"No frames replayed from {args.path}")
+        return 1
+
+    summary = latency_summary(tracker.latency_samples, elapsed)
+    summary['frames_dropped'] = source.dropped_count
+    summary['stages'] = tracker.profiler.snapshot()['stages']
+    summary['detector'] = tracker.detector_report()
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(summary, output, indent=2)
+
+    if args.max_p95 is not None and summary['latency_ms_p95'] > args.max_p95:
+        print(f"p95 latency {summary['latency_ms_p95']:.2f} ms exceeds budget of {args.max_p95} ms")
+        return 1
+    return 0
+
+
+def ring_targets(screen, count, distance):
+    # ISO 9241-9 style: targets on a circle, visited in an order that always crosses it
+    center_x, center_y = screen[0] / 2, screen[1] / 2
+    step = (count + 1) // 2
+    targets = []
+    for i in range(count):
+        angle = 2 * math.pi * ((i * step) % count) / count
+        targets.append((center_x + distance / 2 * math.cos(angle), center_y + distance / 2 * math.sin(angle)))
+    return targets
+
+
+def draw_targets(screen, targets, width, current):
+    canvas = np.zeros((screen[1], screen[0], 3), dtype=np.uint8)
+    for index, (x, y) in enumerate(targets):
+        filled = -1 if index == current else 2
+        cv2.circle(canvas, (int(x), int(y)), int(width / 2), (0, 200, 0) if index == current else (90, 90, 90), filled)
+    return canvas
+
+
+def record_pointing(args):
+    backend = PyAutoGuiBackend()
+    screen = backend.screen_size()
+    targets = ring_targets(screen, args.targets, args.distance)
+    center = (screen[0] // 2, screen[1] // 2)
+    trials = len(targets) * args.laps
+    duration = args.lead_in + trials * args.interval
+
+    tracker = FaceTracker()
+    tracker.input_backend = backend
+    tracker.preview_mode = 'off'
+    tracker.pointing_mode = args.mode
+    # 60 fps worth of room; the recorder simply stops if the camera is faster
+    tracker.recorder = SessionRecorder(args.path, max_frames=int(duration * 60) + 1,
+                                       record_frames=not args.landmarks_only, record_landmarks=True)
+    backend.move_to(*center)
+
+    window = 'Pointing targets'
+    cv2.namedWindow(window, cv2.WND_PROP_FULLSCREEN)
+    cv2.setWindowProperty(window, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    tracker.start()
+
+    # Look at the centre while the pointer calibrates, then acquire each highlighted target in turn
+    presentations = []
+    aborted = False
+    schedule = [(None, args.lead_in)] + [(trial % len(targets), args.interval) for trial in range(trials)]
+    for index, interval in schedule:
+        if index is None:
+            canvas = draw_targets(screen, [center], args.width, 0)
+        else:
+            canvas = draw_targets(screen, targets, args.width, index)
+        shown = time.perf_counter()
+        if index is not None:
+            presentations.append((shown, index))
+        while time.perf_counter() - shown < interval:
+            cv2.imshow(window, canvas)
+            if cv2.waitKey(15) & 0xFF == 27:
+                aborted = True
+                break
+        if aborted:
+            break
+    cv2.destroyWindow(window)
+
+    # Timestamps share the perf_counter clock with the recorded frames
+    tracker.recorder.metadata['pointing'] = {
+        'mode': args.mode,
+        'screen': list(screen),
+        'targets': [list(target) for target in targets],
+        'distance': args.distance,
+        'width': args.width,
+        'presentations': presentations,
+    }
+    tracker.stop()
+    tracker.wait()
+    print(f"Recorded {tracker.recorder.count} frames and {len(presentations)} targets to {args.path}")
+    return 1 if aborted else 0
+
+
+def acquisition_times(path, end_time, presentations, targets, width, dwell):
+    # The cursor holds each position until the next move; a target counts once the cursor has
+    # stayed inside it for dwell seconds before the next target was shown
+    times = []
+    for i, (shown, index) in enumerate(presentations):
+        until = presentations[i + 1][0] if i + 1 < len(presentations) else end_time
+        target_x, target_y = targets[index]
+        entered = None
+        acquired = None
+        for j, (timestamp, x, y) in enumerate(path):
+            segment_end = path[j + 1][0] if j + 1 < len(path) else end_time
+            if segment_end <= shown:
+                continue
+            if timestamp >= until:
+                break
+            if math.hypot(x - target_x, y - target_y) > width / 2:
+                entered = None
+                continue
+            if entered is None:
+                entered = max(timestamp, shown)
+            if min(segment_end, until) - entered >= dwell:
+                acquired = entered - shown
+                break
+        times.append(acquired)
+    return times
+
+
+def pointing(args):
+    source = ReplaySource(args.path, realtime=True)  # Acquisition times need the recorded pacing
+    protocol = source.meta.get('pointing')
+    if not source.count:
+        print(f"No frames replayed from {args.path}")
+        return 1
+    if protocol is None:
+        print(f"{args.path} has no pointing targets; record it with 'record-pointing'")
+        return 1
+
+    tracker = FaceTracker()
+    tracker.frame_source = source
+    tracker.preview_mode = 'off'
+    tracker.overlay.enabled = False
+    tracker.pointing_mode = args.mode or protocol['mode']
+    if args.landmarks_only:
+        tracker.detector = ReplayLandmarkDetector(source)
+    elif not source.meta['has_frames']:
+        print(f"{args.path} was recorded without frames; replay it with --landmarks-only")
+        return 1
+
+    backend = PointerSimulationBackend(tuple(protocol['screen']))
+    tracker.input_backend = backend
+    tracker.run()
+    if tracker.error is not None:
+        print(f"Replay of {args.path} failed: {tracker.error}")
+        return 1
+    presentations = [(source.replay_time(shown), index) for shown, index in protocol['presentations']]
+    times = acquisition_times(backend.path, time.perf_counter(), presentations, protocol['targets'],
+                              protocol['width'], args.dwell)
+
+    # The first trial starts from the screen centre rather than across the ring, so it is left out
+    movement_times = [t for t in times[1:] if t is not None and t > 0]
+    index_of_difficulty = math.log2(protocol['distance'] / protocol['width'] + 1)
+    summary = {
+        'mode': tracker.pointing_mode,
+        'trials': len(times),
+        'acquired': sum(t is not None for t in times),
+        'index_of_difficulty': index_of_difficulty,
+    }
+    if movement_times:
+        summary['movement_time_ms_mean'] = float(np.mean(movement_times) * 1000)
+        summary['throughput_bits_per_s'] = float(np.mean([index_of_difficulty / t for t in movement_times]))
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(summary, output, indent=2)
+    return 0 if movement_times else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record and replay face tracking sessions.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='record a session from the webcam')
+    record_parser.add_argument('path')
+    record_parser.add_argument('--frames', type=int, default=300)
+    record_parser.add_argument('--landmarks-only', action='store_true', help='skip saving raw frames')
+    record_parser.add_argument('--preview', action='store_true')
+
+    replay_parser = subparsers.add_parser('replay', help='benchmark the tracker on a recorded session')
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--realtime', action='store_true', help='pace frames at the recorded rate')
+    replay_parser.add_argument('--landmarks-only', action='store_true', help='use recorded landmarks instead of FaceMesh')
+    replay_parser.add_argument('--json', help='write the summary to this file')
+    replay_parser.add_argument('--max-p95', type=float, help='fail if p95 latency exceeds this many ms')
+
+    record_pointing_parser = subparsers.add_parser('record-pointing',
+                                                   help='record a session while acquiring on-screen targets')
+    record_pointing_parser.add_argument('path')
+    record_pointing_parser.add_argument('--mode', choices=['relative', 'absolute'], default='absolute')
+    record_pointing_parser.add_argument('--landmarks-only', action='store_true', help='skip saving raw frames')
+    record_pointing_parser.add_argument('--targets', type=int, default=9, help='number of targets on the ring (odd)')
+    record_pointing_parser.add_argument('--distance', type=float, default=600, help='ring diameter in pixels')
+    record_pointing_parser.add_argument('--width', type=float, default=80, help='target diameter in pixels')
+    record_pointing_parser.add_argument('--interval', type=float, default=2.5, help='seconds each target is shown')
+    record_pointing_parser.add_argument('--laps', type=int, default=1)
+    record_pointing_parser.add_argument('--lead-in', type=float, default=2.0,
+                                        help='seconds looking at the centre before the first target')
+
+    pointing_parser = subparsers.add_parser('pointing', help='Fitts-style target acquisition on a pointing recording')
+    pointing_parser.add_argument('path')
+    pointing_parser.add_argument('--mode', choices=['relative', 'absolute'], help='defaults to the recorded mode')
+    pointing_parser.add_argument('--landmarks-only', action='store_true', help='use recorded landmarks instead of FaceMesh')
+    pointing_parser.add_argument('--dwell', type=float, default=0.3, help='seconds inside a target to select it')
+    pointing_parser.add_argument('--json', help='write the summary to this file')
+
+    args = parser.parse_args(argv)
+    if args.command == 'record-pointing' and args.targets % 2 == 0:
+        parser.error('--targets must be odd so the ring order visits every target')
+    app = QCoreApplication(sys.argv)  # noqa: F841
+
+    if args.command == 'record':
+        record(args)
+        return 0
+    if args.command == 'record-pointing':
+        return record_pointing(args)
+    if args.command == 'pointing':
+        return pointing(args)
+    return replay(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
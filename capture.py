@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameGrabber(threading.Thread):
+    def __init__(self, camera_index=0, buffer_size=2, resolution=None):
+        super().__init__(daemon=True)
+        self.camera_index = camera_index
+        self.requested_resolution = resolution
+        self.resolution = None
+        self.min_interval = 0.0  # Raised by the tracker to poll slowly while idle
+        self.frames = deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+        self.running = False
+        self.captured_count = 0
+        self.dropped_count = 0
+        self.failed_reads = 0
+        self.exhausted = False
+
+    def start(self):
+        # A prewarmed grabber is already running when the tracker takes it over
+        if self.running:
+            return
+        self.running = True
+        super().start()
+
+    def open_camera(self):
+        cap = cv2.VideoCapture(self.camera_index)
+        if self.requested_resolution is not None:
+            width, height = self.requested_resolution
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # The driver may pick the closest mode it supports
+        self.resolution = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        return cap
+
+    def run(self):
+        cap = self.open_camera()
+        last_retrieve = 0.0
+
+        while self.running:
+            # grab() keeps the driver queue fresh; decoding is skipped for frames we throttle away
+            if not cap.grab():
+                self.failed_reads += 1
+                time.sleep(0.01)
+                continue
+
+            timestamp = time.perf_counter()
+            if timestamp - last_retrieve < self.min_interval:
+                continue
+            success, image = cap.retrieve()
+            if not success:
+                self.failed_reads += 1
+                continue
+            last_retrieve = timestamp
+
+            with self.condition:
+                # The ring buffer overwrites the oldest frame when full
+                if len(self.frames) == self.frames.maxlen:
+                    self.dropped_count += 1
+                self.frames.append((timestamp, image))
+                self.captured_count += 1
+                self.condition.notify()
+
+        cap.release()
+
+    def read(self, timeout=1.0):
+        with self.condition:
+            if not self.frames:
+                self.condition.wait(timeout)
+            if not self.frames:
+                return False, None, None
+
+            # Always hand out the newest frame and discard anything older
+            timestamp, image = self.frames.pop()
+            self.dropped_count += len(self.frames)
+            self.frames.clear()
+
+        return True, image, timestamp
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.is_alive():
+            self.join(timeout=2.0)
@@ -1,39 +1,216 @@
 import configparser
 import os
+import stat
+import tempfile
+import threading
+
+from cursor_filter import ACCELERATION_CURVES
+from gestures import CLICK_ACTIONS
+
+
+class Setting:
+    def __init__(self, type, default, minimum=None, maximum=None, choices=None):
+        self.type = type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+
+    def parse(self, value):
+        if isinstance(value, str):
+            value = value.strip()
+            if self.type is bool:
+                lowered = value.lower()
+                if lowered not in ('true', 'false', '1', '0', 'yes', 'no', 'on', 'off'):
+                    raise ValueError(f"Expected a boolean, got {value!r}")
+                value = lowered in ('true', '1', 'yes', 'on')
+            else:
+                value = self.type(value)
+        else:
+            value = self.type(value)
+
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{value} is below the minimum of {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{value} is above the maximum of {self.maximum}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{value!r} is not one of {', '.join(self.choices)}")
+        return value
+
+
+SCHEMA = {
+    'TRACKING': {
+        'sensitivity': Setting(int, 3, 1, 10),
+        'blink_threshold': Setting(float, 0.2, 0.0, 1.0),
+        'blink_duration': Setting(float, 0.3, 0.0, 5.0),
+        'blink_hysteresis': Setting(float, 0.02, 0.0, 1.0),
+        'long_blink_duration': Setting(float, 1.0, 0.0, 10.0),
+        'mouth_open_threshold': Setting(int, 30, 0, 500),
+        'mouth_open_duration': Setting(float, 0.5, 0.0, 5.0),
+        'mouth_open_hysteresis': Setting(float, 3.0, 0.0, 500.0),
+        'tilt_threshold': Setting(float, 10.0, 0.0, 90.0),
+        'tilt_hysteresis': Setting(float, 2.0, 0.0, 90.0),
+        'scroll_speed': Setting(float, 20.0, 0.0, 1000.0),
+        'show_overlay': Setting(bool, True),
+        'profiling': Setting(bool, True),
+        'cursor_filter': Setting(str, 'one_euro', choices=['one_euro', 'kalman', 'none']),
+        'filter_min_cutoff': Setting(float, 1.0, 0.001),
+        'filter_beta': Setting(float, 0.007, 0.0),
+        'kalman_process_noise': Setting(float, 500.0, 0.001),
+        'kalman_measurement_noise': Setting(float, 4.0, 0.001),
+        'acceleration_curve': Setting(str, 'linear', choices=ACCELERATION_CURVES),
+        'capture_width': Setting(int, 640, 160, 4096),
+        'capture_height': Setting(int, 480, 120, 4096),
+        'roi_cropping': Setting(bool, True),
+        'idle_timeout': Setting(float, 5.0, 0.0),
+        'idle_fps': Setting(float, 2.0, 0.1, 60.0),
+        'optical_flow': Setting(bool, False),
+        'keyframe_interval': Setting(int, 4, 1, 30),
+        'inference_process': Setting(bool, False),
+        'release_camera_after': Setting(float, 60.0, 0.0),
+        'preview_mode': Setting(str, 'window', choices=['window', 'app', 'off']),
+        'preview_fps': Setting(float, 15.0, 1.0, 60.0),
+        'preview_width': Setting(int, 320, 80, 1920),
+        'pointing_mode': Setting(str, 'relative', choices=['relative', 'absolute']),
+        'pointing_yaw_range': Setting(float, 20.0, 1.0, 90.0),
+        'pointing_pitch_range': Setting(float, 12.0, 1.0, 90.0),
+    },
+    # Which action each gesture performs; 'none' turns the gesture (and its feature) off
+    'GESTURES': {
+        'left_blink': Setting(str, 'left_click', choices=CLICK_ACTIONS + ['none']),
+        'right_blink': Setting(str, 'right_click', choices=CLICK_ACTIONS + ['none']),
+        'long_blink': Setting(str, 'none', choices=CLICK_ACTIONS + ['drag', 'none']),
+        'mouth_open': Setting(str, 'double_click', choices=CLICK_ACTIONS + ['none']),
+        'head_tilt': Setting(str, 'scroll', choices=['scroll', 'none']),
+    },
+    'SPEECH': {
+        'recognizer': Setting(str, 'google', choices=['google', 'vosk']),
+        'vosk_model_path': Setting(str, ''),
+        'command_pause': Setting(float, 0.3, 0.1, 2.0),
+    },
+}
+
+
+class ConfigSnapshot:
+    def __init__(self, version, values):
+        self.version = version
+        self.values = values
+
+    def get(self, section, key):
+        return self.values[section][key]
+
+    def section(self, section):
+        return self.values[section]
+
 
 class ConfigManager:
-    def __init__(self, config_file='config.ini'):
+    def __init__(self, config_file='config.ini', save_delay=0.5):
         self.config_file = config_file
-        self.config = configparser.ConfigParser()
+        self.save_delay = save_delay
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.values = {}
+        self.version = 0
+        self._snapshot = None
+        self._save_timer = None
         self.load_config()
 
     def load_config(self):
-        if os.path.exists(self.config_file):
-            self.config.read(self.config_file)
-        else:
+        if not os.path.exists(self.config_file):
             self.set_defaults()
+            return
+
+        with self.lock:
+            self.values = {section: {key: setting.default for key, setting in settings.items()}
+                           for section, settings in SCHEMA.items()}
+            config = configparser.ConfigParser()
+            config.read(self.config_file)
+            for section in config.sections():
+                values = self.values.setdefault(section, {})
+                for key, raw in config.items(section):
+                    setting = SCHEMA.get(section, {}).get(key)
+                    if setting is None:
+                        values[key] = raw
+                        continue
+                    try:
+                        values[key] = setting.parse(raw)
+                    except ValueError as e:
+                        print(f"Ignoring invalid config value {section}.{key}={raw!r}: {e}")
+            self.version += 1
 
     def set_defaults(self):
-        self.config['TRACKING'] = {
-            'sensitivity': '3',
-            'blink_threshold': '0.2',
-            'blink_duration': '0.3',
-            'mouth_open_threshold': '30',
-            'mouth_open_duration': '0.5',
-            'tilt_threshold': '10',
-            'scroll_speed': '20'
-        }
+        with self.lock:
+            self.values = {section: {key: setting.default for key, setting in settings.items()}
+                           for section, settings in SCHEMA.items()}
+            self.version += 1
         self.save_config()
 
+    def get(self, section, key):
+        with self.lock:
+            return self.values[section][key]
+
     def get_value(self, section, key, fallback=None):
-        return self.config.get(section, key, fallback=fallback)
+        with self.lock:
+            value = self.values.get(section, {}).get(key)
+        return fallback if value is None else str(value)
 
     def set_value(self, section, key, value):
-        if not self.config.has_section(section):
-            self.config.add_section(section)
-        self.config.set(section, key, str(value))
-        self.save_config()
+        setting = SCHEMA.get(section, {}).get(key)
+        value = setting.parse(value) if setting is not None else str(value)
+
+        with self.lock:
+            values = self.values.setdefault(section, {})
+            if values.get(key) == value:
+                return
+            values[key] = value
+            self.version += 1
+        self.schedule_save()
+
+    def snapshot(self):
+        with self.lock:
+            if self._snapshot is None or self._snapshot.version != self.version:
+                values = {section: dict(values) for section, values in self.values.items()}
+                self._snapshot = ConfigSnapshot(self.version, values)
+            return self._snapshot
+
+    def schedule_save(self):
+        # Restart the timer on every change so a burst of edits ends in a single write
+        with self.lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.save_config)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        with self.lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save_config()
 
     def save_config(self):
-        with open(self.config_file, 'w') as configfile:
-            self.config.write(configfile)
\ No newline at end of file
+        # Writes are serialized so an older snapshot can never replace a newer file
+        with self.write_lock:
+            with self.lock:
+                config = configparser.ConfigParser()
+                for section, values in self.values.items():
+                    config[section] = {key: str(value) for key, value in values.items()}
+
+            directory = os.path.dirname(os.path.abspath(self.config_file))
+            fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+            try:
+                # The file object owns fd from here, so it is closed on every path
+                with os.fdopen(fd, 'w') as configfile:
+                    # mkstemp creates the file 0600; keep the permissions config.ini already had.
+                    # A new file gets a fixed 0644, since reading the umask would briefly change it for every thread
+                    if os.path.exists(self.config_file):
+                        os.chmod(temp_path, stat.S_IMODE(os.stat(self.config_file).st_mode))
+                    else:
+                        os.chmod(temp_path, 0o644)
+                    config.write(configfile)
+                # Readers only ever see the old file or the complete new one
+                os.replace(temp_path, self.config_file)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
@@ -0,0 +1,227 @@
+import math
+
+import numpy as np
+
+import features
+
+
+class PassthroughFilter:
+    def filter(self, value, timestamp):
+        return value
+
+    def reset(self):
+        pass
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None
+        self.timestamp = None
+
+    @staticmethod
+    def smoothing_factor(dt, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, value, timestamp):
+        value = np.asarray(value, dtype=np.float64)
+        if self.value is None:
+            self.value = value
+            self.derivative = np.zeros_like(value)
+            self.timestamp = timestamp
+            return value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+
+        alpha_d = self.smoothing_factor(dt, self.d_cutoff)
+        derivative = (value - self.value) / dt
+        self.derivative = alpha_d * derivative + (1 - alpha_d) * self.derivative
+
+        # Cutoff rises with speed: heavy smoothing when still, little lag when moving fast
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        alpha = self.smoothing_factor(dt, cutoff)
+        self.value = alpha * value + (1 - alpha) * self.value
+        return self.value
+
+
+class ConstantVelocityKalman:
+    def __init__(self, process_noise=500.0, measurement_noise=4.0):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.H = np.hstack([np.eye(2), np.zeros((2, 2))])
+        self.R = np.eye(2) * measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.covariance = None
+        self.timestamp = None
+
+    def filter(self, value, timestamp):
+        value = np.asarray(value, dtype=np.float64)
+        if self.state is None:
+            self.state = np.concatenate([value, np.zeros(2)])
+            self.covariance = np.diag([self.measurement_noise] * 2 + [1e3] * 2)
+            self.timestamp = timestamp
+            return value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.state[:2]
+        self.timestamp = timestamp
+
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # Piecewise white-noise acceleration model
+        G = np.array([dt * dt / 2, dt])
+        q = np.outer(G, G) * self.process_noise
+        Q = np.zeros((4, 4))
+        Q[np.ix_([0, 2], [0, 2])] = q
+        Q[np.ix_([1, 3], [1, 3])] = q
+
+        state = F @ self.state
+        covariance = F @ self.covariance @ F.T + Q
+
+        innovation = value - self.H @ state
+        S = self.H @ covariance @ self.H.T + self.R
+        K = covariance @ self.H.T @ np.linalg.inv(S)
+        self.state = state + K @ innovation
+        self.covariance = (np.eye(4) - K @ self.H) @ covariance
+        return self.state[:2]
+
+
+def create_filter(name, **params):
+    if name == 'one_euro':
+        return OneEuroFilter(**params)
+    if name == 'kalman':
+        return ConstantVelocityKalman(**params)
+    if name == 'none':
+        return PassthroughFilter()
+    raise ValueError(f"Unknown cursor filter: {name}")
+
+
+ACCELERATION_CURVES = ['linear', 'quadratic', 'sigmoid']
+
+
+def acceleration_gain(curve, sensitivity, speed, reference_speed=300.0):
+    # Base gain keeps the historical sensitivity**2 / 2 mapping for the linear curve
+    base = sensitivity ** 2 / 2
+    if curve == 'linear':
+        return base
+    if curve == 'quadratic':
+        return base * (0.5 + speed / reference_speed)
+    if curve == 'sigmoid':
+        return base * (0.25 + 1.75 / (1 + math.exp(-(speed - reference_speed) / (reference_speed / 4))))
+    raise ValueError(f"Unknown acceleration curve: {curve}")
+
+
+class SubPixelAccumulator:
+    def __init__(self):
+        self.remainder = np.zeros(2)
+
+    def add(self, delta):
+        total = self.remainder + delta
+        step = np.trunc(total)
+        self.remainder = total - step
+        return int(step[0]), int(step[1])
+
+    def reset(self):
+        self.remainder = np.zeros(2)
+
+
+CURSOR_SETTINGS = ('cursor_filter', 'filter_min_cutoff', 'filter_beta',
+                   'kalman_process_noise', 'kalman_measurement_noise', 'acceleration_curve')
+
+
+def create_cursor_motion(settings):
+    name = settings['cursor_filter']
+    if name == 'one_euro':
+        params = {'min_cutoff': settings['filter_min_cutoff'], 'beta': settings['filter_beta']}
+    elif name == 'kalman':
+        params = {'process_noise': settings['kalman_process_noise'],
+                  'measurement_noise': settings['kalman_measurement_noise']}
+    else:
+        params = {}
+    return CursorMotion(create_filter(name, **params), settings['acceleration_curve'])
+
+
+class CursorMotion:
+    def __init__(self, position_filter=None, acceleration_curve='linear'):
+        self.position_filter = position_filter if position_filter is not None else OneEuroFilter()
+        self.acceleration_curve = acceleration_curve
+        self.accumulator = SubPixelAccumulator()
+        self.previous_anchor = None
+        self.previous_timestamp = None
+
+    def update(self, points, timestamp, sensitivity):
+        anchor = self.position_filter.filter(points[features.STABLE_ROWS, :2].mean(axis=0), timestamp)
+        if self.previous_anchor is None:
+            self.previous_anchor = anchor.copy()
+            self.previous_timestamp = timestamp
+            return 0, 0
+
+        delta = anchor - self.previous_anchor
+        dt = max(timestamp - self.previous_timestamp, 1e-3)
+        self.previous_anchor = anchor.copy()
+        self.previous_timestamp = timestamp
+
+        gain = acceleration_gain(self.acceleration_curve, sensitivity, float(np.hypot(*delta)) / dt)
+        # The preview is mirrored, so horizontal head motion is inverted
+        return self.accumulator.add(delta * gain * (-1, 1))
+
+    def reset(self):
+        self.position_filter.reset()
+        self.accumulator.reset()
+        self.previous_anchor = None
+        self.previous_timestamp = None
+
+
+class AbsolutePointer:
+    def __init__(self, screen_size, yaw_range=20.0, pitch_range=12.0, position_filter=None, calibration_frames=15,
+                 origin=(0, 0)):
+        self.screen_size = screen_size
+        self.origin = origin
+        self.yaw_range = yaw_range
+        self.pitch_range = pitch_range
+        self.position_filter = position_filter if position_filter is not None else OneEuroFilter()
+        self.calibration_frames = calibration_frames
+        self.calibrate()
+
+    def calibrate(self):
+        # The next few poses are averaged into the one that points at the screen centre
+        self.samples = []
+        self.center = None
+        self.position_filter.reset()
+
+    def reset(self):
+        # Forget the motion history but keep the calibrated centre; an unfinished calibration starts over
+        self.samples = []
+        self.position_filter.reset()
+
+    def update(self, pose, timestamp):
+        angles = np.array(pose[:2], dtype=np.float64)
+        if self.center is None:
+            self.samples.append(angles)
+            if len(self.samples) < self.calibration_frames:
+                return None
+            self.center = np.mean(self.samples, axis=0)
+            self.samples = []
+            print(f"Pointer calibrated: yaw {self.center[0]:.1f}, pitch {self.center[1]:.1f}")
+
+        offset = self.position_filter.filter(angles - self.center, timestamp)
+        # Turning by the configured range reaches the screen edge
+        normalized = np.clip(offset / (self.yaw_range, self.pitch_range), -1.0, 1.0)
+        width, height = self.screen_size
+        left, top = self.origin
+        return (left + int(round((normalized[0] + 1) / 2 * (width - 1))),
+                top + int(round((normalized[1] + 1) / 2 * (height - 1))))
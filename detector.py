@@ -0,0 +1,89 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import features
+
+
+class FaceMeshDetector:
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, roi_cropping=True, roi_margin=0.5):
+        mp_face_mesh = mp.solutions.face_mesh
+        self.face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True,
+                                               min_detection_confidence=min_detection_confidence,
+                                               min_tracking_confidence=min_tracking_confidence)
+        self.profiler = None
+        self.roi_cropping = roi_cropping
+        self.roi_margin = roi_margin
+        self.roi = None
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def detect(self, image):
+        if self.roi is not None:
+            points = self.process(image, self.roi)
+            if points is not None:
+                self.roi_frames += 1
+                self.update_roi(points, image.shape)
+                return points
+            # Lost the face inside the crop; retry on the full frame
+            self.roi = None
+            if self.profiler is not None:
+                # Charge the failed attempt to inference, so the retry's convert lap only covers its conversion
+                self.profiler.lap('inference')
+
+        points = self.process(image)
+        self.full_frames += 1
+        if points is not None and self.roi_cropping:
+            self.update_roi(points, image.shape)
+        return points
+
+    def process(self, image, roi=None):
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            image = image[y0:y1, x0:x1]
+
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if self.profiler is not None:
+            self.profiler.lap('convert')
+        results = self.face_mesh.process(image_rgb)
+        if not results.multi_face_landmarks:
+            return None
+
+        face_landmarks = results.multi_face_landmarks[0]
+        points = features.landmarks_to_array(face_landmarks, image.shape[1], image.shape[0])
+        if roi is not None:
+            points[:, 0] += x0
+            points[:, 1] += y0
+        return points
+
+    def update_roi(self, points, frame_shape):
+        (left, top), (right, bottom) = points[:, :2].min(axis=0), points[:, :2].max(axis=0)
+        face_size = max(right - left, bottom - top)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset = face_size * self.roi_margin / 2
+            # Keep the crop fixed while the face stays well inside it, so FaceMesh's own tracking stays stable
+            inside = left - x0 > inset and top - y0 > inset and x1 - right > inset and y1 - bottom > inset
+            if inside and (x1 - x0) < face_size * (1 + 2 * self.roi_margin) * 1.5:
+                return
+
+        frame_height, frame_width = frame_shape[:2]
+        half = face_size * (1 + 2 * self.roi_margin) / 2
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        x0, y0 = np.clip([center_x - half, center_y - half], 0, [frame_width, frame_height]).astype(int).tolist()
+        x1, y1 = np.clip([center_x + half, center_y + half], 0, [frame_width, frame_height]).astype(int).tolist()
+        if x1 - x0 < 32 or y1 - y0 < 32 or (x1 - x0 >= frame_width and y1 - y0 >= frame_height):
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+
+    def configure(self, roi_cropping):
+        self.roi_cropping = roi_cropping
+        self.roi = None
+
+    def reset(self):
+        self.roi = None
+
+    def close(self):
+        self.face_mesh.close()
@@ -1,229 +1,447 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import cv2
-import mediapipe as mp
 import numpy as np
-import pyautogui
+import threading
 import time
+import traceback
+from collections import deque
+from capture import FrameGrabber
+from cursor_filter import CURSOR_SETTINGS, AbsolutePointer, CursorMotion, create_cursor_motion, create_filter
+from detector import FaceMeshDetector
+from gestures import GESTURE_BINDINGS, GESTURE_SETTINGS, GestureEngine, default_gestures
+from head_pose import HeadPoseEstimator
+from optical_flow import OpticalFlowDetector
+import features
+from input_dispatch import InputDispatcher
+from overlay import HudOverlay
+from profiling import StageProfiler
 
 class FaceTracker(QThread):
     finished = pyqtSignal()
+    errorOccurred = pyqtSignal(str)
+    metricsUpdated = pyqtSignal(dict)
+    previewFrame = pyqtSignal(object)
 
     def __init__(self, sensitivity=3, blink_threshold=0.2, blink_duration=0.3, 
                  mouth_open_threshold=30, mouth_open_duration=0.5, 
-                 tilt_threshold=10, scroll_speed=20):
+                 tilt_threshold=10, scroll_speed=20, show_overlay=True, profiling=True,
+                 cursor_filter='one_euro', acceleration_curve='linear'):
         super().__init__()
         self.sensitivity = sensitivity
-        self.previous_positions = None
+        self.cursor_motion = CursorMotion(create_filter(cursor_filter), acceleration_curve)
+        self.cursor_settings = None
+        # 'relative' follows frame-to-frame motion, 'absolute' maps head pose straight to a screen position
+        self.pointing_mode = 'relative'
+        self.pointing_yaw_range = 20.0
+        self.pointing_pitch_range = 12.0
+        self.head_pose = HeadPoseEstimator()
+        self.pointer = None
+        self.pointer_calibration_requested = False
+        self.config_source = None
+        self.config_version = None
         self.blink_threshold = blink_threshold
         self.blink_duration = blink_duration
-        self.left_eye_closed = False
-        self.right_eye_closed = False
-        self.left_blink_start = 0
-        self.right_blink_start = 0
+        self.blink_hysteresis = 0.02
+        self.long_blink_duration = 1.0
         self.mouth_open_threshold = mouth_open_threshold
-        self.mouth_open = False
-        self.mouth_open_start = 0
         self.mouth_open_duration = mouth_open_duration
+        self.mouth_open_hysteresis = 3.0
         self.tilt_threshold = tilt_threshold
+        self.tilt_hysteresis = 2.0
         self.scroll_speed = scroll_speed
-        self.neutral_angle = None
-        self.calibration_frames = 30
+        self.gesture_bindings = dict(GESTURE_BINDINGS)
+        self.gesture_settings = None
+        self.gestures = None
+        self.update_gestures()
         self.scroll_mode_active = False  # Add a flag for scroll mode
-
-    def detect_blink(self, eye_landmarks, image):
-        height, width = image.shape[:2]
-        
-        eye_points = [
-            (int(eye_landmarks[p].x * width), int(eye_landmarks[p].y * height))
-            for p in range(len(eye_landmarks))
-        ]
-        
-        ear = self.eye_aspect_ratio(eye_points)
-        
-        return ear < self.blink_threshold
-
-    def eye_aspect_ratio(self, eye):
-        A = self.distance(eye[1], eye[5])
-        B = self.distance(eye[2], eye[4])
-        C = self.distance(eye[0], eye[3])
-        ear = (A + B) / (2.0 * C)
-        return ear
-
-    def distance(self, p1, p2):
-        return ((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)**0.5
-
-    def detect_mouth_open(self, mouth_landmarks, image):
-        height, width = image.shape[:2]
-        
-        if len(mouth_landmarks) < 2:
-            return False
-        
-        top_lip = int(mouth_landmarks[0].y * height)
-        bottom_lip = int(mouth_landmarks[1].y * height)
-        
-        mouth_opening = bottom_lip - top_lip
-        return mouth_opening > self.mouth_open_threshold
-
-    def detect_head_tilt(self, face_landmarks, image):
+        self.camera_index = 0
+        self.capture_resolution = (640, 480)
+        self.roi_cropping = True
+        self.idle_timeout = 5.0
+        self.idle_fps = 2.0
+        self.idle = False
+        self.optical_flow = False
+        self.keyframe_interval = 4
+        self.session = None
+        self.frame_source = None
+        self.detector = None
+        # The detector chain of the current run, optical flow wrapper included, for its counters
+        self.active_detector = None
+        self.running = False
+        # The exception that ended the last run, if any
+        self.error = None
+        self.resumed = threading.Event()
+        self.resumed.set()
+        self.recorder = None
+        # 'window' is the OpenCV window, 'app' streams small frames to the GUI, 'off' draws nothing
+        self.preview_mode = 'window'
+        self.preview_fps = 15.0
+        self.preview_width = 320
+        self.preview_pending = threading.Event()
+        self.last_preview_time = 0.0
+        self.max_frames = None
+        self.first_frame_time = None
+        self.input_backend = None
+        self.dispatcher = None
+        self.overlay = HudOverlay()
+        self.overlay.enabled = show_overlay
+        self.profiler = StageProfiler(enabled=profiling)
+        self.metrics_interval = 1.0
+        self.latency_samples = deque(maxlen=300)
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+    def apply_config(self, config):
+        tracking = config.section('TRACKING')
+        self.sensitivity = tracking['sensitivity']
+        for key in GESTURE_SETTINGS:
+            setattr(self, key, tracking[key])
+        self.gesture_bindings = dict(config.section('GESTURES'))
+        self.update_gestures()
+        self.scroll_speed = tracking['scroll_speed']
+        self.overlay.enabled = tracking['show_overlay']
+        self.profiler.enabled = tracking['profiling']
+        self.idle_timeout = tracking['idle_timeout']
+        self.idle_fps = tracking['idle_fps']
+        self.preview_fps = tracking['preview_fps']
+        if tracking['pointing_mode'] != self.pointing_mode:
+            # Neither mode's state is valid after the other has been moving the cursor
+            self.cursor_motion.reset()
+            self.pointer_calibration_requested = True
+            self.pointing_mode = tracking['pointing_mode']
+        self.pointing_yaw_range = tracking['pointing_yaw_range']
+        self.pointing_pitch_range = tracking['pointing_pitch_range']
+        if self.pointer is not None:
+            self.pointer.yaw_range = self.pointing_yaw_range
+            self.pointer.pitch_range = self.pointing_pitch_range
+        self.preview_width = tracking['preview_width']
+
+        cursor_settings = tuple(tracking[key] for key in CURSOR_SETTINGS)
+        if cursor_settings != self.cursor_settings:
+            self.cursor_motion = create_cursor_motion(tracking)
+            self.cursor_settings = cursor_settings
+
+        # These only take effect the next time tracking starts
+        self.capture_resolution = (tracking['capture_width'], tracking['capture_height'])
+        self.roi_cropping = tracking['roi_cropping']
+        self.optical_flow = tracking['optical_flow']
+        self.keyframe_interval = tracking['keyframe_interval']
+        if not self.running:
+            self.preview_mode = tracking['preview_mode']
+
+        self.config_version = config.version
+
+    def update_gestures(self):
+        settings = {key: getattr(self, key) for key in GESTURE_SETTINGS}
+        if (settings, self.gesture_bindings) == self.gesture_settings:
+            return
+        engine = GestureEngine(default_gestures(settings, self.gesture_bindings))
+        if self.gestures is not None:
+            # Keep the calibrated neutral pose, and let go of anything the old table was holding
+            engine.baselines = self.gestures.baselines
+            self.perform_gestures(self.gestures.reset())
+        self.gestures = engine
+        self.gesture_settings = (settings, dict(self.gesture_bindings))
+
+    def perform_action(self, action):
+        # Lets commands from outside the loop (e.g. voice) reuse the gesture actions
+        if action in ('scroll_up', 'scroll_down'):
+            # 10 degrees past the tilt threshold, i.e. one scroll_speed step
+            self.perform_gestures([('scroll', 'fire', 10.0 if action == 'scroll_up' else -10.0)])
+        else:
+            self.perform_gestures([(action, 'fire', None)])
+
+    def perform_gestures(self, events):
+        # Checks the dispatcher rather than self.running, so the drag release at the end of run() after stop() still goes out
+        if self.dispatcher is None or not self.dispatcher.is_alive():
+            return
+        for action, phase, value in events:
+            if action == 'drag':
+                if phase == 'start':
+                    self.dispatcher.mouse_down()
+                    print("Drag start")
+                else:
+                    self.dispatcher.mouse_up()
+                    print("Drag end")
+            elif phase == 'end':
+                continue
+            elif action == 'scroll':
+                scroll_amount = int(value * self.scroll_speed / 10)
+                self.dispatcher.scroll(scroll_amount)
+                print(f"Scrolling: {scroll_amount}")
+            elif action == 'double_click':
+                self.dispatcher.double_click()
+                print("Double Click")
+            else:
+                button = action.split('_')[0]
+                self.dispatcher.click(button=button)
+                print(f"{button.capitalize()} Click")
+
+    def capture_report(self):
+        report = {
+            'frames_processed': self.frames_processed,
+            'frames_dropped': self.frames_dropped,
+        }
+        if self.latency_samples:
+            samples = np.array(self.latency_samples) * 1000
+            report['latency_ms_mean'] = float(samples.mean())
+            report['latency_ms_p50'] = float(np.percentile(samples, 50))
+            report['latency_ms_p95'] = float(np.percentile(samples, 95))
+        return report
+
+    def detector_report(self):
+        # ROI hits vs full-frame searches from FaceMesh, keyframes vs propagated frames from optical flow;
+        # a worker process keeps its counters to itself
+        report = {}
+        detector = self.active_detector
+        while detector is not None:
+            for counter in ('roi_frames', 'full_frames', 'keyframes', 'propagated_frames'):
+                if hasattr(detector, counter):
+                    report[counter] = getattr(detector, counter)
+            detector = getattr(detector, 'detector', None)
+        return report
+
+    def metrics_snapshot(self):
+        snapshot = self.profiler.snapshot()
+        snapshot['capture'] = self.capture_report()
+        snapshot['detector'] = self.detector_report()
+        if self.dispatcher is not None:
+            snapshot['dispatch'] = self.dispatcher.metrics()
+        return snapshot
+
+    def pause(self):
+        self.resumed.clear()
+
+    def resume(self):
+        self.resumed.set()
+
+    def stop(self):
+        self.running = False
+        self.resumed.set()
+
+    def is_paused(self):
+        return self.running and not self.resumed.is_set()
+
+    def reset_gesture_state(self):
+        # Anything measured before a pause would turn into a jump, a click or a scroll on resume
+        self.cursor_motion.reset()
+        self.head_pose.reset()
+        # Recalibrating here would silently re-centre on wherever the user happens to look on resume
+        if self.pointer is not None:
+            self.pointer.reset()
+        self.perform_gestures(self.gestures.reset())
+        self.idle = False
+
+    def recalibrate_pointer(self):
+        # Picked up by the tracking thread on its next frame
+        self.pointer_calibration_requested = True
+
+    def point(self, points, image, timestamp):
+        if self.pointer is None:
+            left, top, width, height = self.dispatcher.screen_bounds()
+            self.pointer = AbsolutePointer((width, height), self.pointing_yaw_range, self.pointing_pitch_range,
+                                           origin=(left, top))
+        elif self.pointer_calibration_requested:
+            self.pointer.calibrate()
+        self.pointer_calibration_requested = False
+        pose = self.head_pose.estimate(points, image.shape[1], image.shape[0])
+        if pose is None:
+            return
+        target = self.pointer.update(pose, timestamp)
+        if target is not None:
+            self.dispatcher.move_to(*target)
+
+    def preview_due(self, now):
+        if self.preview_mode == 'window':
+            return True
+        if self.preview_mode == 'app':
+            # Skip while the GUI is still painting the previous frame
+            return now - self.last_preview_time >= 1.0 / self.preview_fps and not self.preview_pending.is_set()
+        return False
+
+    def emit_preview(self, image, now):
         height, width = image.shape[:2]
-        
-        nose_tip = (face_landmarks.landmark[4].x * width, face_landmarks.landmark[4].y * height)
-        left_eye = (face_landmarks.landmark[159].x * width, face_landmarks.landmark[159].y * height)
-        right_eye = (face_landmarks.landmark[386].x * width, face_landmarks.landmark[386].y * height)
-        
-        eye_center = ((left_eye[0] + right_eye[0]) / 2, (left_eye[1] + right_eye[1]) / 2)
-        
-        delta_y = nose_tip[1] - eye_center[1]
-        delta_x = nose_tip[0] - eye_center[0]
-        angle = np.degrees(np.arctan2(delta_y, delta_x)) - 90
-        
-        return angle
+        if width > self.preview_width:
+            size = (self.preview_width, int(height * self.preview_width / width))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        frame = cv2.cvtColor(cv2.flip(image, 1), cv2.COLOR_BGR2RGB)
+        self.last_preview_time = now
+        self.preview_pending.set()
+        self.previewFrame.emit(frame)
+
+    def preview_consumed(self):
+        self.preview_pending.clear()
+
+    def open_source(self, source=None):
+        if self.session is not None:
+            return self.session.open_camera()
+        # On resume without a session the paused source is still open, so it is reused
+        if source is None:
+            source = self.frame_source
+            if source is None:
+                source = FrameGrabber(self.camera_index, resolution=self.capture_resolution)
+            source.start()
+        source.min_interval = 0.0
+        return source
+
+    def wait_while_paused(self, source):
+        self.perform_gestures(self.gestures.reset())
+        # The camera and model stay loaded; the grabber just stops decoding at full rate
+        if self.session is not None:
+            self.session.park()
+        else:
+            source.min_interval = 1.0
+        print("Tracking paused")
+        self.resumed.wait()
+        if not self.running:
+            return source
+        source = self.open_source(source)
+        self.reset_gesture_state()
+        print("Tracking resumed")
+        return source
 
     def run(self):
-        cap = cv2.VideoCapture(0)
-        mp_face_mesh = mp.solutions.face_mesh
-        face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-        stable_landmarks_indices = [1, 4, 5, 6, 10, 152, 101, 330, 362, 385, 387, 263, 373, 380, 33, 160, 158, 133, 153, 144, 13, 14]
-        left_eye_indices = [362, 385, 387, 263, 373, 380]
-        right_eye_indices = [33, 160, 158, 133, 153, 144]
-        mouth_indices = [13, 14]
-
-        pyautogui.FAILSAFE = False
-        calibration_count = 0
-
-        while True:
-            success, image = cap.read()
-            if not success:
-                continue
-
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(image_rgb)
-
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    current_positions = []
-
-                    for idx in stable_landmarks_indices:
-                        landmark = face_landmarks.landmark[idx]
-                        x = int(landmark.x * image.shape[1])
-                        y = int(landmark.y * image.shape[0])
-                        current_positions.append((x, y))
-                        cv2.circle(image, (x, y), 2, (0, 255, 0), -1)
-
-                    left_eye_landmarks = [face_landmarks.landmark[i] for i in left_eye_indices]
-                    right_eye_landmarks = [face_landmarks.landmark[i] for i in right_eye_indices]
-                    mouth_landmarks = [face_landmarks.landmark[i] for i in mouth_indices]
-
-                    left_blink = self.detect_blink(left_eye_landmarks, image)
-                    right_blink = self.detect_blink(right_eye_landmarks, image)
-                    mouth_open = self.detect_mouth_open(mouth_landmarks, image)
-
-                    mouth_opening = int(mouth_landmarks[1].y * image.shape[0]) - int(mouth_landmarks[0].y * image.shape[0])
-                    tilt_angle = self.detect_head_tilt(face_landmarks, image)
-                    relative_tilt = abs(tilt_angle - (self.neutral_angle or 0))
-                    left_eye_points = [(int(lm.x * image.shape[1]), int(lm.y * image.shape[0])) for lm in left_eye_landmarks]
-                    left_ear = self.eye_aspect_ratio(left_eye_points)
-                    right_eye_points = [(int(lm.x * image.shape[1]), int(lm.y * image.shape[0])) for lm in right_eye_landmarks]
-                    right_ear = self.eye_aspect_ratio(right_eye_points)
-
-                    texts = [
-                        f'Left EAR: {left_ear:.2f}',
-                        f'Right EAR: {right_ear:.2f}',
-                        f'Mouth Opening: {mouth_opening}',
-                        f'Head Tilt: {abs(relative_tilt):.2f}'
-                    ]
-                    
-                    y_position = 30
-                    for text in texts:
-                        # Create a blank image for the text
-                        text_image = np.zeros_like(image)
-                        cv2.putText(text_image, text, (30, y_position), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2, cv2.LINE_AA)
-
-                        # Mirror the text image
-                        mirrored_text_image = cv2.flip(text_image, 1)
-
-                        # Overlay the mirrored text image onto the original frame
-                        mask = mirrored_text_image > 0
-                        image[mask] = mirrored_text_image[mask]
-
-                        y_position += 30  # Adjust y_position for the next line of text
-
-
-                    current_time = time.time()
-
-                    # Handle left eye blink
-                    if left_blink and not self.left_eye_closed:
-                        self.left_eye_closed = True
-                        self.left_blink_start = current_time
-                    elif not left_blink and self.left_eye_closed:
-                        if current_time - self.left_blink_start > self.blink_duration:
-                            pyautogui.click(button='left')
-                            print("Left Click")
-                        self.left_eye_closed = False
-
-                    # Handle right eye blink
-                    if right_blink and not self.right_eye_closed:
-                        self.right_eye_closed = True
-                        self.right_blink_start = current_time
-                    elif not right_blink and self.right_eye_closed:
-                        if current_time - self.right_blink_start > self.blink_duration:
-                            pyautogui.click(button='right')
-                            print("Right Click")
-                        self.right_eye_closed = False
-
-                    # Handle mouth open (double-click)
-                    if mouth_open and not self.mouth_open:
-                        self.mouth_open = True
-                        self.mouth_open_start = current_time
-                    elif not mouth_open and self.mouth_open:
-                        if current_time - self.mouth_open_start > self.mouth_open_duration:
-                            pyautogui.doubleClick()
-                            print("Double Click")
-                        self.mouth_open = False
-
-                    # Head tilt detection and scrolling
-                    if self.scroll_mode_active:
-                        tilt_angle = self.detect_head_tilt(face_landmarks, image)
-                        
-                        if self.neutral_angle is None:
-                            if calibration_count < self.calibration_frames:
-                                if self.neutral_angle is None:
-                                    self.neutral_angle = 0
-                                self.neutral_angle += tilt_angle
-                                calibration_count += 1
-                            else:
-                                self.neutral_angle /= self.calibration_frames
-                                print(f"Calibration complete. Neutral angle: {self.neutral_angle}")
-                        else:
-                            relative_tilt = tilt_angle - self.neutral_angle
-                            if abs(relative_tilt) > self.tilt_threshold:
-                                scroll_amount = int((relative_tilt - self.tilt_threshold) * self.scroll_speed / 10)
-                                pyautogui.scroll(scroll_amount)
-                                print(f"Scrolling: {scroll_amount}")
-
-                    if self.previous_positions is not None:
-                        move_x = 0
-                        move_y = 0
-                        for i, (prev_pos, curr_pos) in enumerate(zip(self.previous_positions, current_positions)):
-                            move_x += curr_pos[0] - prev_pos[0]
-                            move_y += curr_pos[1] - prev_pos[1]
-                        
-                        move_x /= len(stable_landmarks_indices)
-                        move_y /= len(stable_landmarks_indices)
-
-                        try:
-                            movement = (-(move_x * (self.sensitivity)**2)**1/2, (move_y * (self.sensitivity)**2)**1/2)
-                        except:
-                            movement = (0, 0)
-                        pyautogui.moveRel(movement[0], movement[1])
-
-                    self.previous_positions = current_positions
-
-            cv2.imshow('Face Tracker', cv2.flip(image, 1))
-            if cv2.waitKey(5) & 0xFF == 27:  # Press 'ESC' to exit
-                break
-
-        cap.release()
-        cv2.destroyAllWindows()
-        self.finished.emit()
\ No newline at end of file
+        self.first_frame_time = None
+        self.running = True
+        self.error = None
+        self.preview_pending.clear()
+        source = None
+        detector = None
+        owns_detector = False
+        self.dispatcher = None
+        try:
+            source = self.open_source()
+            if self.session is not None:
+                if self.session.detector is None:
+                    self.session.detector = FaceMeshDetector(roi_cropping=self.roi_cropping)
+                detector = self.session.detector
+            else:
+                detector = self.detector if self.detector is not None else FaceMeshDetector(roi_cropping=self.roi_cropping)
+            owns_detector = self.session is None and self.detector is None
+            detector.reset()
+            if self.optical_flow:
+                detector = OpticalFlowDetector(detector, max_interval=self.keyframe_interval)
+            detector.profiler = self.profiler
+            self.active_detector = detector
+
+            self.dispatcher = InputDispatcher(self.input_backend)
+            self.dispatcher.profiler = self.profiler
+            self.dispatcher.start()
+            self.head_pose.reset()
+            if self.pointer is not None:
+                self.pointer.reset()
+            last_metrics_emit = time.perf_counter()
+            last_face_time = last_metrics_emit
+
+            while self.running:
+                if not self.resumed.is_set():
+                    source = self.wait_while_paused(source)
+                    detector.reset()
+                    last_face_time = time.perf_counter()
+                    continue
+
+                self.profiler.begin_frame()
+                success, image, capture_time = source.read()
+                self.profiler.lap('capture')
+                self.frames_dropped = source.dropped_count
+                if not success:
+                    if source.exhausted:
+                        break
+                    continue
+
+                # Pick up settings edited in the GUI without restarting
+                if self.config_source is not None and self.config_source.version != self.config_version:
+                    self.apply_config(self.config_source.snapshot())
+
+                current_positions = detector.detect(image)
+                self.profiler.lap('inference')
+
+                if self.recorder is not None:
+                    self.recorder.record(image, current_positions, capture_time)
+
+                # Poll slowly when nobody is in front of the camera, and return to full rate as soon as a face appears
+                if current_positions is not None:
+                    last_face_time = capture_time
+                    if self.idle:
+                        self.idle = False
+                        source.min_interval = 0.0
+                        print("Face detected, resuming full frame rate")
+                elif not self.idle and capture_time - last_face_time > self.idle_timeout:
+                    self.idle = True
+                    source.min_interval = 1.0 / self.idle_fps
+                    print(f"No face for {self.idle_timeout}s, polling at {self.idle_fps} fps")
+
+                # Landmarks and the HUD are only drawn on frames somebody will actually see
+                draw = self.preview_due(capture_time)
+
+                if current_positions is not None:
+                    frame_features = features.FrameFeatures(current_positions)
+
+                    if draw:
+                        for x, y in current_positions[features.STABLE_ROWS, :2].astype(int):
+                            cv2.circle(image, (int(x), int(y)), 2, (0, 255, 0), -1)
+
+                    if draw and self.overlay.enabled:
+                        relative_tilt = frame_features.tilt_angle - self.gestures.baseline('tilt_angle')
+                        self.overlay.draw(image, [
+                            f'Left EAR: {frame_features.left_ear:.2f}',
+                            f'Right EAR: {frame_features.right_ear:.2f}',
+                            f'Mouth Opening: {frame_features.mouth_opening:.0f}',
+                            f'Head Tilt: {abs(relative_tilt):.2f}'
+                        ])
+
+                    modes = ('scroll',) if self.scroll_mode_active else ()
+                    self.perform_gestures(self.gestures.update(frame_features, capture_time, modes))
+
+                    if self.pointing_mode == 'absolute':
+                        self.point(current_positions, image, capture_time)
+                    else:
+                        move_x, move_y = self.cursor_motion.update(current_positions, capture_time, self.sensitivity)
+                        if move_x or move_y:
+                            self.dispatcher.move_rel(move_x, move_y)
+
+                self.profiler.lap('gestures')
+                self.latency_samples.append(time.perf_counter() - capture_time)
+                self.frames_processed += 1
+                if self.first_frame_time is None:
+                    self.first_frame_time = time.perf_counter()
+                if self.max_frames is not None and self.frames_processed >= self.max_frames:
+                    break
+
+                if self.preview_mode == 'window':
+                    cv2.imshow('Face Tracker', cv2.flip(image, 1))
+                    if cv2.waitKey(5) & 0xFF == 27:  # Press 'ESC' to exit
+                        break
+                elif draw:
+                    self.emit_preview(image, capture_time)
+                self.profiler.lap('display')
+
+                if self.profiler.enabled and capture_time - last_metrics_emit >= self.metrics_interval:
+                    self.metricsUpdated.emit(self.metrics_snapshot())
+                    last_metrics_emit = capture_time
+        except Exception as e:
+            # Falls through to the cleanup, so the camera is parked, a held drag released and finished still emitted
+            self.error = e
+            traceback.print_exc()
+            self.errorOccurred.emit(f"Tracking stopped: {e}")
+        finally:
+            # Release a drag that was still held when tracking stopped
+            self.perform_gestures(self.gestures.reset())
+            self.running = False
+            if self.session is not None:
+                self.session.park()
+            elif source is not None:
+                source.stop()
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
+            if owns_detector:
+                detector.close()
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.preview_mode == 'window':
+                cv2.destroyAllWindows()
+            print(f"Capture report: {self.capture_report()}")
+            print(f"Detector report: {self.detector_report()}")
+            if self.dispatcher is not None:
+                print(f"Input dispatch report: {self.dispatcher.metrics()}")
+            self.finished.emit()
\ No newline at end of file
@@ -0,0 +1,80 @@
+from functools import cached_property
+
+import numpy as np
+
+STABLE_LANDMARK_INDICES = [1, 4, 5, 6, 10, 152, 101, 330, 362, 385, 387, 263, 373, 380, 33, 160, 158, 133, 153, 144, 13, 14]
+LEFT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
+RIGHT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
+MOUTH_INDICES = [13, 14]
+TILT_INDICES = [4, 159, 386]  # nose tip, left eye, right eye
+POSE_INDICES = [1, 152, 33, 263, 61, 291]  # nose tip, chin, eye outer corners, mouth corners
+
+# Every landmark the tracker reads, in a fixed order; each frame becomes one (N, 3) array of these
+TRACKED_INDICES = list(dict.fromkeys(
+    STABLE_LANDMARK_INDICES + LEFT_EYE_INDICES + RIGHT_EYE_INDICES + MOUTH_INDICES + TILT_INDICES + POSE_INDICES
+))
+
+_ROW = {index: row for row, index in enumerate(TRACKED_INDICES)}
+
+
+def rows_for(indices):
+    return np.array([_ROW[i] for i in indices], dtype=np.intp)
+
+
+STABLE_ROWS = rows_for(STABLE_LANDMARK_INDICES)
+EYE_ROWS = np.stack([rows_for(LEFT_EYE_INDICES), rows_for(RIGHT_EYE_INDICES)])
+MOUTH_ROWS = rows_for(MOUTH_INDICES)
+TILT_ROWS = rows_for(TILT_INDICES)
+POSE_ROWS = rows_for(POSE_INDICES)
+
+
+def landmarks_to_array(face_landmarks, width, height):
+    landmark = face_landmarks.landmark
+    points = np.array([(landmark[i].x, landmark[i].y, landmark[i].z) for i in TRACKED_INDICES], dtype=np.float64)
+    points *= (width, height, width)
+    return points
+
+
+def eye_aspect_ratios(points):
+    # (2 eyes, 6 points, xy)
+    eyes = points[EYE_ROWS, :2]
+    vertical = np.linalg.norm(eyes[:, [1, 2]] - eyes[:, [5, 4]], axis=2).sum(axis=1)
+    horizontal = np.linalg.norm(eyes[:, 0] - eyes[:, 3], axis=1)
+    return vertical / (2.0 * horizontal)
+
+
+def mouth_opening(points):
+    top_lip, bottom_lip = points[MOUTH_ROWS, 1]
+    return bottom_lip - top_lip
+
+
+def head_tilt(points):
+    nose_tip, left_eye, right_eye = points[TILT_ROWS, :2]
+    delta_x, delta_y = nose_tip - (left_eye + right_eye) / 2
+    return np.degrees(np.arctan2(delta_y, delta_x)) - 90
+
+
+class FrameFeatures:
+    # Each feature is computed on first access, so features no enabled gesture reads are never computed
+    def __init__(self, points):
+        self.points = points
+
+    @cached_property
+    def eye_aspect_ratios(self):
+        return eye_aspect_ratios(self.points)
+
+    @cached_property
+    def left_ear(self):
+        return self.eye_aspect_ratios[0]
+
+    @cached_property
+    def right_ear(self):
+        return self.eye_aspect_ratios[1]
+
+    @cached_property
+    def mouth_opening(self):
+        return mouth_opening(self.points)
+
+    @cached_property
+    def tilt_angle(self):
+        return head_tilt(self.points)
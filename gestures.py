@@ -0,0 +1,139 @@
+import math
+
+CLICK_ACTIONS = ['left_click', 'right_click', 'middle_click', 'double_click']
+
+
+class Gesture:
+    def __init__(self, name, feature, threshold, hysteresis=0.0, above=True, symmetric=False,
+                 min_duration=0.0, max_duration=None, trigger='release', action='none',
+                 baseline_frames=0, mode=None):
+        self.name = name
+        self.feature = feature
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.above = above
+        self.symmetric = symmetric
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        # 'release' fires when the gesture ends, 'hold' fires once it has lasted min_duration
+        # and ends with it, 'continuous' fires every frame with the amount past the threshold
+        self.trigger = trigger
+        self.action = action
+        self.baseline_frames = baseline_frames
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        self.active = False
+        self.started = None
+        self.fired = False
+
+    def is_active(self, value):
+        if self.symmetric:
+            value = abs(value)
+        # Once active, the value has to move back past the threshold by the hysteresis margin to end it
+        margin = self.hysteresis if self.active else 0.0
+        if self.above:
+            return value > self.threshold - margin
+        return value < self.threshold + margin
+
+    def update(self, value, timestamp):
+        events = []
+        active = self.is_active(value)
+        if active and not self.active:
+            self.active = True
+            self.started = timestamp
+            self.fired = False
+        elif not active and self.active:
+            held = timestamp - self.started
+            if self.trigger == 'release':
+                if held > self.min_duration and (self.max_duration is None or held <= self.max_duration):
+                    events.append((self.action, 'fire', None))
+            elif self.trigger == 'hold' and self.fired:
+                events.append((self.action, 'end', None))
+            self.reset()
+
+        if self.active:
+            held = timestamp - self.started
+            if self.trigger == 'hold' and not self.fired and held >= self.min_duration:
+                self.fired = True
+                events.append((self.action, 'start', None))
+            elif self.trigger == 'continuous' and held >= self.min_duration:
+                excess = (abs(value) if self.symmetric else value) - self.threshold
+                if not self.above:
+                    excess = -excess
+                if excess > 0:
+                    events.append((self.action, 'fire', math.copysign(excess, value) if self.symmetric else excess))
+        return events
+
+    def cancel(self):
+        # A hold that already fired (e.g. a drag) still needs its end event
+        events = [(self.action, 'end', None)] if self.trigger == 'hold' and self.fired else []
+        self.reset()
+        return events
+
+
+class GestureEngine:
+    def __init__(self, gestures):
+        # Unbound gestures are dropped here, so neither they nor their features cost anything per frame
+        self.gestures = [gesture for gesture in gestures if gesture.action != 'none']
+        self.baselines = {}
+        self.baseline_samples = {}
+
+    def update(self, frame_features, timestamp, modes=()):
+        events = []
+        for gesture in self.gestures:
+            if gesture.mode is not None and gesture.mode not in modes:
+                events.extend(gesture.cancel())
+                continue
+
+            value = getattr(frame_features, gesture.feature)
+            if gesture.baseline_frames:
+                baseline = self.baselines.get(gesture.feature)
+                if baseline is None:
+                    samples = self.baseline_samples.setdefault(gesture.feature, [])
+                    samples.append(value)
+                    if len(samples) < gesture.baseline_frames:
+                        continue
+                    baseline = self.baselines[gesture.feature] = sum(samples) / len(samples)
+                    print(f"Calibration complete. Neutral {gesture.feature}: {baseline}")
+                value -= baseline
+            events.extend(gesture.update(value, timestamp))
+        return events
+
+    def baseline(self, feature):
+        return self.baselines.get(feature, 0.0)
+
+    def reset(self):
+        return [event for gesture in self.gestures for event in gesture.cancel()]
+
+
+GESTURE_BINDINGS = {
+    'left_blink': 'left_click',
+    'right_blink': 'right_click',
+    'long_blink': 'none',
+    'mouth_open': 'double_click',
+    'head_tilt': 'scroll',
+}
+
+GESTURE_SETTINGS = ('blink_threshold', 'blink_duration', 'blink_hysteresis', 'long_blink_duration',
+                    'mouth_open_threshold', 'mouth_open_duration', 'mouth_open_hysteresis',
+                    'tilt_threshold', 'tilt_hysteresis')
+
+
+def default_gestures(settings, bindings):
+    long_blink = settings['long_blink_duration']
+    # With a long-blink binding, left blinks longer than long_blink_duration no longer also click
+    blink_limit = long_blink if bindings['long_blink'] != 'none' else None
+    return [
+        Gesture('left_blink', 'left_ear', settings['blink_threshold'], settings['blink_hysteresis'], above=False,
+                min_duration=settings['blink_duration'], max_duration=blink_limit, action=bindings['left_blink']),
+        Gesture('right_blink', 'right_ear', settings['blink_threshold'], settings['blink_hysteresis'], above=False,
+                min_duration=settings['blink_duration'], action=bindings['right_blink']),
+        Gesture('long_blink', 'left_ear', settings['blink_threshold'], settings['blink_hysteresis'], above=False,
+                min_duration=long_blink, trigger='hold', action=bindings['long_blink']),
+        Gesture('mouth_open', 'mouth_opening', settings['mouth_open_threshold'], settings['mouth_open_hysteresis'],
+                min_duration=settings['mouth_open_duration'], action=bindings['mouth_open']),
+        Gesture('head_tilt', 'tilt_angle', settings['tilt_threshold'], settings['tilt_hysteresis'], symmetric=True,
+                trigger='continuous', action=bindings['head_tilt'], baseline_frames=30, mode='scroll'),
+    ]
@@ -1,11 +1,11 @@
 from PyQt5.QtWidgets import (QWidget, QPushButton, QVBoxLayout, QSlider, QLabel, 
                              QLineEdit, QHBoxLayout, QGroupBox, QFormLayout, QSpacerItem, QSizePolicy)
-from PyQt5.QtCore import Qt
-from face_tracking import FaceTracker
-from speech import SpeechToText
+from PyQt5.QtCore import Qt, QTimer
 from config_manager import ConfigManager
-import pyautogui
-from PyQt5.QtGui import QDesktopServices
+from startup import TrackerPrewarm
+from text_injection import TextInjector
+import time
+from PyQt5.QtGui import QDesktopServices, QImage, QPixmap
 from PyQt5.QtCore import QUrl
 
 class MainWindow(QWidget):
@@ -14,6 +14,9 @@ class MainWindow(QWidget):
         self.config_manager = ConfigManager()
         self.initUI()
         self.speech_to_text_active = False
+        self.benchmark_start = None
+        # Build the model and open the camera once the window is up
+        QTimer.singleShot(0, self.startPrewarm)
 
     def initUI(self):
         self.setWindowTitle('Face Tracking GUI with Speech-to-Text')
@@ -56,13 +59,22 @@ class MainWindow(QWidget):
 
         # Control buttons
         button_layout = QHBoxLayout()
-        self.startButton = QPushButton('Start Tracking', self)
+        self.startButton = QPushButton('Loading...', self)
+        self.startButton.setEnabled(False)
         self.startButton.clicked.connect(self.startTracking)
         self.speakButton = QPushButton('Speak', self)
         self.speakButton.clicked.connect(self.startSpeechToText)
         self.scrollButton = QPushButton('Toggle Scroll Mode', self)
         self.scrollButton.clicked.connect(self.toggleScrollMode)
+        self.pauseButton = QPushButton('Pause Tracking', self)
+        self.pauseButton.setEnabled(False)
+        self.pauseButton.clicked.connect(self.togglePause)
+        self.stopButton = QPushButton('Stop Tracking', self)
+        self.stopButton.setEnabled(False)
+        self.stopButton.clicked.connect(self.stopTracking)
         button_layout.addWidget(self.startButton)
+        button_layout.addWidget(self.pauseButton)
+        button_layout.addWidget(self.stopButton)
         button_layout.addWidget(self.speakButton)
         button_layout.addWidget(self.scrollButton)
         main_layout.addLayout(button_layout)
@@ -72,6 +84,26 @@ class MainWindow(QWidget):
         self.youtubeButton.clicked.connect(self.openYouTubeVideo)
         main_layout.addWidget(self.youtubeButton)
 
+        # Absolute pointing: look at the screen centre while this runs
+        self.calibratePointerButton = QPushButton('Calibrate Pointer', self)
+        self.calibratePointerButton.clicked.connect(self.calibratePointer)
+        main_layout.addWidget(self.calibratePointerButton)
+
+        # Fixed-vocabulary commands ("click", "scroll down", "stop tracking"), recognized locally
+        self.voiceCommandButton = QPushButton('Voice Commands', self)
+        self.voiceCommandButton.clicked.connect(self.toggleVoiceCommands)
+        main_layout.addWidget(self.voiceCommandButton)
+
+        # Live transcript while a phrase is still being spoken
+        self.speechLabel = QLabel('', self)
+        main_layout.addWidget(self.speechLabel)
+
+        # In-app camera preview, fed with small frames when preview_mode is 'app'
+        self.previewLabel = QLabel(self)
+        self.previewLabel.setAlignment(Qt.AlignCenter)
+        self.previewLabel.setVisible(False)
+        main_layout.addWidget(self.previewLabel)
+
         # Sensitivity slider
         sensitivity_group = QGroupBox("Sensitivity Control")
         sensitivity_layout = QVBoxLayout()
@@ -112,52 +144,228 @@ class MainWindow(QWidget):
         params_group.setLayout(params_layout)
         main_layout.addWidget(params_group)
 
-        # Connect the value changed signals to update the config
-        self.blinkThresholdInput.textChanged.connect(lambda: self.updateConfig('blink_threshold', self.blinkThresholdInput.text()))
-        self.blinkDurationInput.textChanged.connect(lambda: self.updateConfig('blink_duration', self.blinkDurationInput.text()))
-        self.mouthOpenThresholdInput.textChanged.connect(lambda: self.updateConfig('mouth_open_threshold', self.mouthOpenThresholdInput.text()))
-        self.mouthOpenDurationInput.textChanged.connect(lambda: self.updateConfig('mouth_open_duration', self.mouthOpenDurationInput.text()))
-        self.tiltThresholdInput.textChanged.connect(lambda: self.updateConfig('tilt_threshold', self.tiltThresholdInput.text()))
-        self.scrollSpeedInput.textChanged.connect(lambda: self.updateConfig('scroll_speed', self.scrollSpeedInput.text()))
+        # Commit when the user finishes editing, so half-typed values never reach the running tracker
+        self.blinkThresholdInput.editingFinished.connect(lambda: self.updateConfig('blink_threshold', self.blinkThresholdInput))
+        self.blinkDurationInput.editingFinished.connect(lambda: self.updateConfig('blink_duration', self.blinkDurationInput))
+        self.mouthOpenThresholdInput.editingFinished.connect(lambda: self.updateConfig('mouth_open_threshold', self.mouthOpenThresholdInput))
+        self.mouthOpenDurationInput.editingFinished.connect(lambda: self.updateConfig('mouth_open_duration', self.mouthOpenDurationInput))
+        self.tiltThresholdInput.editingFinished.connect(lambda: self.updateConfig('tilt_threshold', self.tiltThresholdInput))
+        self.scrollSpeedInput.editingFinished.connect(lambda: self.updateConfig('scroll_speed', self.scrollSpeedInput))
+
+        # Live pipeline metrics
+        metrics_group = QGroupBox("Performance")
+        metrics_layout = QVBoxLayout()
+        self.metricsLabel = QLabel('FPS: -', self)
+        self.exportMetricsButton = QPushButton('Export Metrics', self)
+        self.exportMetricsButton.clicked.connect(self.exportMetrics)
+        metrics_layout.addWidget(self.metricsLabel)
+        metrics_layout.addWidget(self.exportMetricsButton)
+        metrics_group.setLayout(metrics_layout)
+        main_layout.addWidget(metrics_group)
 
         # Add some spacing
         main_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
 
         self.setLayout(main_layout)
 
+        # The tracker, its model and the speech engine are created lazily to keep startup fast
+        self.face_tracker = None
+        self.prewarm = None
+        # Owns the camera and the model so they outlive individual tracking runs
+        self.session = None
+        self.scroll_mode_active = False
+        self.speech_to_text = None
+        self.command_listener = None
+
+        # Optional out-of-process FaceMesh, kept alive across tracking runs
+        self.inference_worker = None
+        self.inferenceWatchdog = QTimer(self)
+        self.inferenceWatchdog.timeout.connect(self.checkInferenceWorker)
+
+        # Dictated text is typed off the GUI thread, in the order it was recognized
+        self.text_injector = TextInjector()
+        self.text_injector.start()
+
+    def startPrewarm(self):
+        self.prewarm = TrackerPrewarm(self.config_manager.snapshot())
+        self.prewarm.ready.connect(self.onPrewarmReady)
+        self.prewarm.failed.connect(self.onPrewarmFailed)
+        self.prewarm.start()
+
+    def onPrewarmReady(self):
+        self.session = self.prewarm.session
+        if self.config_manager.get('TRACKING', 'inference_process'):
+            self.inference_worker = self.session.detector
+            self.inferenceWatchdog.start(2000)
+        self.createFaceTracker()
+        self.startButton.setText('Start Tracking')
+        self.startButton.setEnabled(True)
+        if self.benchmark_start is not None:
+            self.face_tracker.max_frames = 1
+            self.startTracking()
+
+    def onPrewarmFailed(self, error_message):
+        # Tracking can still try to open the camera and model itself
+        print(f"Tracker prewarm failed: {error_message}")
+        # Whatever did open (usually the camera) is still reused and cleaned up through the session
+        self.session = self.prewarm.session
+        self.startButton.setText('Start Tracking')
+        self.startButton.setEnabled(True)
+        if self.benchmark_start is not None:
+            self.close()
+
+    def createFaceTracker(self):
+        from face_tracking import FaceTracker
         self.face_tracker = FaceTracker(sensitivity=self.sensitivitySlider.value())
+        self.face_tracker.scroll_mode_active = self.scroll_mode_active
         self.face_tracker.finished.connect(self.onTrackingFinished)
-
-        self.speech_to_text = SpeechToText()
-        self.speech_to_text.textReady.connect(self.onSpeechRecognized)
-        self.speech_to_text.errorOccurred.connect(self.onSpeechError)
+        self.face_tracker.errorOccurred.connect(self.onTrackingError)
+        self.face_tracker.metricsUpdated.connect(self.onMetricsUpdated)
+        self.face_tracker.previewFrame.connect(self.onPreviewFrame)
 
     def startTracking(self):
         self.startButton.setEnabled(False)
-        self.face_tracker.sensitivity = self.sensitivitySlider.value()
-        self.face_tracker.blink_threshold = float(self.blinkThresholdInput.text())
-        self.face_tracker.blink_duration = float(self.blinkDurationInput.text())
-        self.face_tracker.mouth_open_threshold = int(self.mouthOpenThresholdInput.text())
-        self.face_tracker.mouth_open_duration = float(self.mouthOpenDurationInput.text())
-        self.face_tracker.tilt_threshold = float(self.tiltThresholdInput.text())
-        self.face_tracker.scroll_speed = float(self.scrollSpeedInput.text())
+        if self.face_tracker is None:
+            self.createFaceTracker()
+        self.face_tracker.config_source = self.config_manager
+        self.face_tracker.apply_config(self.config_manager.snapshot())
+        if self.session is None:
+            from tracking_session import TrackingSession
+            self.session = TrackingSession(resolution=self.face_tracker.capture_resolution)
+        self.session.release_after = self.config_manager.get('TRACKING', 'release_camera_after')
+        self.session.configure(self.face_tracker.capture_resolution, self.face_tracker.roi_cropping)
+        if self.config_manager.get('TRACKING', 'inference_process'):
+            self.startInferenceWorker()
+            if self.session.detector is not self.inference_worker:
+                if self.session.detector is not None:
+                    self.session.detector.close()
+                self.session.detector = self.inference_worker
+        elif self.session.detector is self.inference_worker:
+            # The tracker builds an in-thread model on its next run
+            self.session.detector = None
+        self.face_tracker.session = self.session
+        self.previewLabel.setVisible(self.face_tracker.preview_mode == 'app')
         self.face_tracker.start()
+        self.pauseButton.setEnabled(True)
+        self.stopButton.setEnabled(True)
+
+    def togglePause(self):
+        if self.face_tracker is None or not self.face_tracker.isRunning():
+            return
+        if self.face_tracker.is_paused():
+            self.face_tracker.resume()
+            self.pauseButton.setText('Pause Tracking')
+        else:
+            self.face_tracker.pause()
+            self.pauseButton.setText('Resume Tracking')
+
+    def stopTracking(self):
+        if self.face_tracker is not None:
+            self.face_tracker.stop()
+        self.pauseButton.setEnabled(False)
+        self.stopButton.setEnabled(False)
+
+    def benchmarkStartup(self, process_start):
+        self.benchmark_start = process_start
+        # Fires on the first event loop pass, once the window has been shown
+        QTimer.singleShot(0, lambda: print(f"Time to window: {(time.perf_counter() - process_start) * 1000:.0f} ms"))
+
+    def startInferenceWorker(self):
+        if self.inference_worker is not None:
+            return
+        from inference_worker import ProcessDetector
+        # Not started here: the first detect() spawns the worker on the tracking thread instead of blocking the window
+        self.inference_worker = ProcessDetector(roi_cropping=self.face_tracker.roi_cropping)
+        self.inferenceWatchdog.start(2000)
+
+    def checkInferenceWorker(self):
+        if self.inference_worker is not None:
+            self.inference_worker.check_health()
+
+    def stopInferenceWorker(self):
+        self.inferenceWatchdog.stop()
+        if self.inference_worker is not None:
+            self.inference_worker.close()
+            self.inference_worker = None
+
+    def closeEvent(self, event):
+        if self.prewarm is not None:
+            self.prewarm.wait()
+            if self.session is None:
+                self.session = self.prewarm.session
+        if self.face_tracker is not None and self.face_tracker.isRunning():
+            self.face_tracker.stop()
+            self.face_tracker.wait()
+        if self.command_listener is not None and self.command_listener.isRunning():
+            self.command_listener.stopListening()
+            self.command_listener.wait()
+        self.stopInferenceWorker()
+        if self.session is not None:
+            self.session.close()
+        self.text_injector.stop()
+        self.config_manager.flush()
+        super().closeEvent(event)
+
+    def onTrackingError(self, error_message):
+        # finished follows, which resets the buttons
+        print(f"Face Tracking Error: {error_message}")
 
     def onTrackingFinished(self):
         self.startButton.setEnabled(True)
+        self.pauseButton.setEnabled(False)
+        self.pauseButton.setText('Pause Tracking')
+        self.stopButton.setEnabled(False)
+        self.previewLabel.clear()
+        self.previewLabel.setVisible(False)
+        if self.benchmark_start is not None and self.face_tracker.first_frame_time is not None:
+            print(f"Time to first tracked frame: {(self.face_tracker.first_frame_time - self.benchmark_start) * 1000:.0f} ms")
+            self.close()
+
+    def onPreviewFrame(self, frame):
+        height, width = frame.shape[:2]
+        image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_RGB888)
+        self.previewLabel.setPixmap(QPixmap.fromImage(image))
+        # Lets the tracker send the next frame; anything produced meanwhile was dropped
+        self.face_tracker.preview_consumed()
+
+    def onMetricsUpdated(self, metrics):
+        stages = ', '.join(f"{stage} {stats['mean_ms']:.1f} ms" for stage, stats in metrics['stages'].items())
+        self.metricsLabel.setText(f"FPS: {metrics['fps']:.1f}\n{stages}")
+
+    def exportMetrics(self):
+        if self.face_tracker is None:
+            return
+        self.face_tracker.profiler.export_csv('tracking_metrics.csv')
+        self.face_tracker.profiler.export_json('tracking_metrics.json')
+        print("Metrics exported to tracking_metrics.csv and tracking_metrics.json")
 
     def openYouTubeVideo(self):
         QDesktopServices.openUrl(QUrl("https://www.youtube.com/watch?v=Em6n8RKEHAk"))
 
     def updateSensitivity(self, value):
         self.sensitivityLabel.setText(f'Sensitivity: {value}')
-        self.face_tracker.sensitivity = value
-        self.config_manager.set_value('TRACKING', 'sensitivity', str(value))
+        self.config_manager.set_value('TRACKING', 'sensitivity', value)
 
-    def updateConfig(self, key, value):
-        self.config_manager.set_value('TRACKING', key, value)
+    def updateConfig(self, key, field):
+        # Values the schema rejects (not a number, out of range) are reverted to the one in effect
+        try:
+            self.config_manager.set_value('TRACKING', key, field.text())
+        except ValueError as e:
+            print(f"Invalid value for {key}: {e}")
+            field.setText(self.config_manager.get_value('TRACKING', key))
+
+    def createSpeechToText(self):
+        from speech import SpeechToText, create_recognizer
+        recognizer = create_recognizer(self.config_manager.get('SPEECH', 'recognizer'),
+                                       model_path=self.config_manager.get('SPEECH', 'vosk_model_path'))
+        self.speech_to_text = SpeechToText(recognizer)
+        self.speech_to_text.textReady.connect(self.onSpeechRecognized)
+        self.speech_to_text.partialTextReady.connect(self.onPartialSpeech)
+        self.speech_to_text.errorOccurred.connect(self.onSpeechError)
 
     def startSpeechToText(self):
+        if self.speech_to_text is None:
+            self.createSpeechToText()
         if not self.speech_to_text_active:
             self.speech_to_text_active = True
             self.speakButton.setText("Stop Listening")
@@ -168,14 +376,64 @@ class MainWindow(QWidget):
             self.speakButton.setText("Speak")
             self.speech_to_text.stopListening()
 
+    def onPartialSpeech(self, text):
+        self.speechLabel.setText(f'Hearing: {text}')
+
     def onSpeechRecognized(self, text):
-        pyautogui.typewrite(text)
+        self.speechLabel.setText('')
+        self.text_injector.inject(text)
 
     def onSpeechError(self, error_message):
         print(f"Speech Recognition Error: {error_message}")
         self.speakButton.setEnabled(True)
 
+    def toggleVoiceCommands(self):
+        if self.command_listener is not None and self.command_listener.isRunning():
+            self.command_listener.stopListening()
+            self.voiceCommandButton.setText('Voice Commands')
+            return
+        from speech import CommandListener
+        self.command_listener = CommandListener(model_path=self.config_manager.get('SPEECH', 'vosk_model_path'))
+        self.command_listener.pause_threshold = self.config_manager.get('SPEECH', 'command_pause')
+        self.command_listener.commandRecognized.connect(self.onVoiceCommand)
+        self.command_listener.errorOccurred.connect(self.onVoiceCommandError)
+        self.command_listener.start()
+        self.voiceCommandButton.setText('Stop Voice Commands')
+
+    def onVoiceCommand(self, action):
+        # While dictating, spoken words are text to type, not commands
+        if self.speech_to_text_active:
+            return
+        tracking = self.face_tracker is not None and self.face_tracker.isRunning()
+        if action == 'toggle_scroll_mode':
+            self.toggleScrollMode()
+        elif action == 'start_tracking':
+            if self.startButton.isEnabled():
+                self.startTracking()
+        elif action == 'stop_tracking':
+            if tracking:
+                self.stopTracking()
+        elif action in ('pause_tracking', 'resume_tracking'):
+            if tracking and self.face_tracker.is_paused() == (action == 'resume_tracking'):
+                self.togglePause()
+        elif action == 'calibrate_pointer':
+            self.calibratePointer()
+        elif tracking:
+            self.face_tracker.perform_action(action)
+        else:
+            print(f"Voice command {action} ignored: tracking is not running")
+
+    def onVoiceCommandError(self, error_message):
+        print(f"Voice Command Error: {error_message}")
+        self.voiceCommandButton.setText('Voice Commands')
+
+    def calibratePointer(self):
+        if self.face_tracker is not None:
+            self.face_tracker.recalibrate_pointer()
+
     def toggleScrollMode(self):
-        self.face_tracker.scroll_mode_active = not self.face_tracker.scroll_mode_active
-        status = "enabled" if self.face_tracker.scroll_mode_active else "disabled"
+        self.scroll_mode_active = not self.scroll_mode_active
+        if self.face_tracker is not None:
+            self.face_tracker.scroll_mode_active = self.scroll_mode_active
+        status = "enabled" if self.scroll_mode_active else "disabled"
         self.scrollButton.setText(f"Scroll Mode: {status}")
\ No newline at end of file
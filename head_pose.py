@@ -0,0 +1,61 @@
+import math
+
+import cv2
+import numpy as np
+
+import features
+
+# Generic adult face in millimetres, ordered like features.POSE_INDICES.
+# Axes follow the camera (x right, y down, z away), so a frontal face solves to an identity rotation.
+FACE_MODEL = np.array([
+    (0.0, 0.0, 0.0),        # nose tip
+    (0.0, 63.6, 12.5),      # chin
+    (-43.3, -32.7, 26.0),   # outer eye corner, image left
+    (43.3, -32.7, 26.0),    # outer eye corner, image right
+    (-28.9, 28.9, 24.1),    # mouth corner, image left
+    (28.9, 28.9, 24.1),     # mouth corner, image right
+])
+
+
+class HeadPoseEstimator:
+    def __init__(self, focal_scale=1.0):
+        self.focal_scale = focal_scale
+        self.intrinsics = {}
+        self.dist_coeffs = np.zeros((4, 1))
+        self.rvec = None
+        self.tvec = None
+
+    def camera_matrix(self, width, height):
+        # Webcams are not calibrated, so approximate a pinhole camera once per frame size
+        matrix = self.intrinsics.get((width, height))
+        if matrix is None:
+            focal = width * self.focal_scale
+            matrix = np.array([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]], dtype=np.float64)
+            self.intrinsics[(width, height)] = matrix
+        return matrix
+
+    def estimate(self, points, width, height):
+        image_points = np.ascontiguousarray(points[features.POSE_ROWS, :2], dtype=np.float64)
+        matrix = self.camera_matrix(width, height)
+        if self.rvec is None:
+            success, rvec, tvec = cv2.solvePnP(FACE_MODEL, image_points, matrix, self.dist_coeffs,
+                                               flags=cv2.SOLVEPNP_EPNP)
+        else:
+            # Starting from the previous pose, the iterative solver converges in a few steps
+            success, rvec, tvec = cv2.solvePnP(FACE_MODEL, image_points, matrix, self.dist_coeffs,
+                                               self.rvec, self.tvec, useExtrinsicGuess=True,
+                                               flags=cv2.SOLVEPNP_ITERATIVE)
+        if not success:
+            self.reset()
+            return None
+        self.rvec, self.tvec = rvec, tvec
+
+        rotation, _ = cv2.Rodrigues(rvec)
+        yaw = math.degrees(math.atan2(-rotation[2, 0], math.hypot(rotation[2, 1], rotation[2, 2])))
+        pitch = math.degrees(math.atan2(rotation[2, 1], rotation[2, 2]))
+        roll = math.degrees(math.atan2(rotation[1, 0], rotation[0, 0]))
+        return yaw, pitch, roll
+
+    def reset(self):
+        self.rvec = None
+        self.tvec = None
@@ -0,0 +1,172 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker_main(buffer_names, frame_shape, connection, options):
+    # Runs in the child process, so MediaPipe's Python-side work never touches the GUI process's GIL
+    from detector import FaceMeshDetector
+
+    buffers = [shared_memory.SharedMemory(name=name) for name in buffer_names]
+    frames = [np.ndarray(frame_shape, dtype=np.uint8, buffer=buffer.buf) for buffer in buffers]
+    detector = FaceMeshDetector(**options)
+    connection.send(('ready', None))
+
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            slot, frame_id = message
+            points = detector.detect(frames[slot])
+            connection.send((frame_id, None if points is None else points.astype(np.float32)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        detector.close()
+        del frames
+        for buffer in buffers:
+            buffer.close()
+
+
+class ProcessDetector:
+    def __init__(self, roi_cropping=True, start_timeout=30.0, detect_timeout=2.0):
+        self.options = {'roi_cropping': roi_cropping}
+        self.start_timeout = start_timeout
+        self.detect_timeout = detect_timeout
+        self.context = multiprocessing.get_context('spawn')
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.process = None
+        self.connection = None
+        self.buffers = []
+        self.frames = []
+        self.frame_shape = None
+        self.slot = 0
+        self.frame_ids = itertools.count()
+        self.restarts = 0
+        self.crashed = False
+        # Failed starts back off exponentially, so a model that cannot load does not respawn every frame
+        self.start_failures = 0
+        self.retry_at = 0.0
+        self.max_retry_delay = 30.0
+
+    def start(self, frame_shape):
+        with self.lock:
+            self._start(frame_shape)
+
+    def _start(self, frame_shape):
+        self.frame_shape = tuple(frame_shape)
+        size = int(np.prod(self.frame_shape))
+        # Two slots, so a new frame never overwrites one the worker may still be reading after a timeout
+        self.buffers = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+        self.frames = [np.ndarray(self.frame_shape, dtype=np.uint8, buffer=buffer.buf) for buffer in self.buffers]
+
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_main, daemon=True,
+                                            args=([buffer.name for buffer in self.buffers], self.frame_shape,
+                                                  child_connection, self.options))
+        self.process.start()
+        child_connection.close()
+
+        if not self.connection.poll(self.start_timeout):
+            self._shutdown()
+            raise RuntimeError("Inference worker did not start in time")
+        try:
+            self.connection.recv()
+        except (EOFError, OSError):
+            # The worker died while loading the model
+            self._shutdown()
+            raise RuntimeError("Inference worker exited during startup")
+
+    def detect(self, image):
+        with self.lock:
+            if self.process is None or self.crashed or image.shape != self.frame_shape:
+                if not self._try_restart(image.shape):
+                    return None
+
+            self.slot ^= 1
+            frame_id = next(self.frame_ids)
+            np.copyto(self.frames[self.slot], image)
+            try:
+                self.connection.send((self.slot, frame_id))
+                while self.connection.poll(self.detect_timeout):
+                    result_id, points = self.connection.recv()
+                    # Drop late answers to requests that already timed out
+                    if result_id == frame_id:
+                        return None if points is None else points.astype(np.float64)
+            except (EOFError, OSError, BrokenPipeError):
+                pass
+
+            print("Inference worker stopped responding, restarting")
+            self._try_restart(image.shape)
+            return None
+
+    def check_health(self):
+        # Called from the GUI thread, so it only flags the crash; detect() restarts the worker on the tracking thread
+        process = self.process
+        if process is not None and not self.crashed and not process.is_alive():
+            print("Inference worker crashed, restarting on the next frame")
+            self.crashed = True
+        return not self.crashed
+
+    def _try_restart(self, frame_shape):
+        # Failures stay in here: the tracking loop just sees frames without a face until the worker is back
+        if time.perf_counter() < self.retry_at:
+            return False
+        try:
+            self._restart(frame_shape)
+        except (RuntimeError, OSError) as e:
+            self.start_failures += 1
+            delay = min(2.0 ** (self.start_failures - 1), self.max_retry_delay)
+            self.retry_at = time.perf_counter() + delay
+            print(f"Inference worker failed to start ({e}), retrying in {delay:.0f}s")
+            return False
+        self.start_failures = 0
+        return True
+
+    def _restart(self, frame_shape):
+        if self.process is not None:
+            self.restarts += 1
+        self._shutdown()
+        self._start(frame_shape)
+
+    def _shutdown(self):
+        if self.process is not None:
+            try:
+                self.connection.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.connection.close()
+            self.process = None
+            self.connection = None
+        self.crashed = False
+
+        self.frames = []
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.buffers = []
+
+    def configure(self, roi_cropping):
+        with self.lock:
+            if self.options['roi_cropping'] != roi_cropping:
+                self.options['roi_cropping'] = roi_cropping
+                # The next detect() starts a worker with the new options, on the tracking thread
+                self._shutdown()
+
+    def reset(self):
+        # The worker re-finds the face on its own once the cropped region misses
+        pass
+
+    def close(self):
+        with self.lock:
+            self._shutdown()
@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class InputBackend:
+    def move_rel(self, dx, dy):
+        raise NotImplementedError
+
+    def move_to(self, x, y):
+        raise NotImplementedError
+
+    def screen_size(self):
+        raise NotImplementedError
+
+    def screen_bounds(self):
+        # (left, top, width, height) of the whole desktop; a single screen by default
+        return (0, 0) + tuple(self.screen_size())
+
+    def click(self, button='left'):
+        raise NotImplementedError
+
+    def double_click(self):
+        raise NotImplementedError
+
+    def mouse_down(self, button='left'):
+        raise NotImplementedError
+
+    def mouse_up(self, button='left'):
+        raise NotImplementedError
+
+    def scroll(self, amount):
+        raise NotImplementedError
+
+
+class PyAutoGuiBackend(InputBackend):
+    def __init__(self):
+        # Imported here so recording/dry-run backends work without a display
+        import pyautogui
+        pyautogui.FAILSAFE = False
+        pyautogui.PAUSE = 0  # The default sleeps after every call
+        self.pyautogui = pyautogui
+
+    def move_rel(self, dx, dy):
+        self.pyautogui.moveRel(dx, dy)
+
+    def move_to(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+    def screen_bounds(self):
+        # pyautogui only knows the primary monitor; Qt knows the whole virtual desktop
+        from PyQt5.QtGui import QGuiApplication
+        app = QGuiApplication.instance()
+        if isinstance(app, QGuiApplication) and app.primaryScreen() is not None:
+            desktop = app.primaryScreen().virtualGeometry()
+            return desktop.x(), desktop.y(), desktop.width(), desktop.height()
+        return super().screen_bounds()
+
+    def click(self, button='left'):
+        self.pyautogui.click(button=button)
+
+    def double_click(self):
+        self.pyautogui.doubleClick()
+
+    def mouse_down(self, button='left'):
+        self.pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button='left'):
+        self.pyautogui.mouseUp(button=button)
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(amount)
+
+
+class RecordingBackend(InputBackend):
+    def __init__(self, screen=(1920, 1080)):
+        self.events = []
+        self.screen = screen
+
+    def move_rel(self, dx, dy):
+        self.events.append(('move_rel', dx, dy))
+
+    def move_to(self, x, y):
+        self.events.append(('move_to', x, y))
+
+    def screen_size(self):
+        return self.screen
+
+    def click(self, button='left'):
+        self.events.append(('click', button))
+
+    def double_click(self):
+        self.events.append(('double_click',))
+
+    def mouse_down(self, button='left'):
+        self.events.append(('mouse_down', button))
+
+    def mouse_up(self, button='left'):
+        self.events.append(('mouse_up', button))
+
+    def scroll(self, amount):
+        self.events.append(('scroll', amount))
+
+
+class DryRunBackend(InputBackend):
+    def __init__(self, screen=(1920, 1080)):
+        self.event_count = 0
+        self.screen = screen
+
+    def move_rel(self, dx, dy):
+        self.event_count += 1
+
+    def move_to(self, x, y):
+        self.event_count += 1
+
+    def screen_size(self):
+        return self.screen
+
+    def click(self, button='left'):
+        self.event_count += 1
+
+    def double_click(self):
+        self.event_count += 1
+
+    def mouse_down(self, button='left'):
+        self.event_count += 1
+
+    def mouse_up(self, button='left'):
+        self.event_count += 1
+
+    def scroll(self, amount):
+        self.event_count += 1
+
+
+class PointerSimulationBackend(DryRunBackend):
+    def __init__(self, screen=(1920, 1080)):
+        super().__init__(screen)
+        # Cursor starts centred; every move appends (time, x, y) for offline pointing analysis
+        self.position = (screen[0] // 2, screen[1] // 2)
+        self.path = [(time.perf_counter(),) + self.position]
+
+    def move_rel(self, dx, dy):
+        self.move_to(self.position[0] + dx, self.position[1] + dy)
+
+    def move_to(self, x, y):
+        self.event_count += 1
+        x = min(max(x, 0), self.screen[0] - 1)
+        y = min(max(y, 0), self.screen[1] - 1)
+        self.position = (x, y)
+        self.path.append((time.perf_counter(), x, y))
+
+
+class InputDispatcher(threading.Thread):
+    def __init__(self, backend=None):
+        super().__init__(daemon=True)
+        self.backend = backend if backend is not None else PyAutoGuiBackend()
+        self.events = queue.Queue()
+        self.dispatch_latency = deque(maxlen=300)
+        self.dispatched_count = 0
+        self.coalesced_count = 0
+        self.profiler = None
+
+    def move_rel(self, dx, dy):
+        self._post('move_rel', dx, dy)
+
+    def move_to(self, x, y):
+        self._post('move_to', x, y)
+
+    def screen_size(self):
+        return self.backend.screen_size()
+
+    def screen_bounds(self):
+        return self.backend.screen_bounds()
+
+    def click(self, button='left'):
+        self._post('click', button)
+
+    def double_click(self):
+        self._post('double_click')
+
+    def mouse_down(self, button='left'):
+        self._post('mouse_down', button)
+
+    def mouse_up(self, button='left'):
+        self._post('mouse_up', button)
+
+    def scroll(self, amount):
+        self._post('scroll', amount)
+
+    def _post(self, action, *args):
+        self.events.put((time.perf_counter(), action, args))
+
+    def queue_depth(self):
+        return self.events.qsize()
+
+    def run(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+
+            batch = [event]
+            stopping = False
+            while True:
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            for enqueued_at, action, args in self.coalesce(batch):
+                started = time.perf_counter_ns()
+                getattr(self.backend, action)(*args)
+                if self.profiler is not None:
+                    self.profiler.record('dispatch', time.perf_counter_ns() - started)
+                self.dispatch_latency.append(time.perf_counter() - enqueued_at)
+                self.dispatched_count += 1
+
+            if stopping:
+                break
+
+    def coalesce(self, batch):
+        # Merge runs of adjacent moves; clicks and scrolls keep their order
+        merged = []
+        for enqueued_at, action, args in batch:
+            if action == 'move_rel' and merged and merged[-1][1] == 'move_rel':
+                first_enqueued, _, (dx, dy) = merged[-1]
+                merged[-1] = (first_enqueued, 'move_rel', (dx + args[0], dy + args[1]))
+                self.coalesced_count += 1
+            elif action == 'move_to' and merged and merged[-1][1] == 'move_to':
+                # Only the latest absolute position matters
+                merged[-1] = (merged[-1][0], 'move_to', args)
+                self.coalesced_count += 1
+            else:
+                merged.append((enqueued_at, action, args))
+        return merged
+
+    def stop(self):
+        self.events.put(None)
+        if self.is_alive():
+            self.join(timeout=2.0)
+
+    def metrics(self):
+        report = {
+            'queue_depth': self.queue_depth(),
+            'dispatched': self.dispatched_count,
+            'coalesced': self.coalesced_count,
+        }
+        if self.dispatch_latency:
+            samples = np.array(self.dispatch_latency) * 1000
+            report['dispatch_ms_p50'] = float(np.percentile(samples, 50))
+            report['dispatch_ms_p95'] = float(np.percentile(samples, 95))
+        return report
@@ -1,9 +1,16 @@
+import time
+STARTUP_TIME = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
 from gui_main_window import MainWindow
+import multiprocessing
 import sys
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Needed for the inference worker in frozen builds
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    if '--startup-benchmark' in sys.argv:
+        window.benchmarkStartup(STARTUP_TIME)
     sys.exit(app.exec_())
\ No newline at end of file
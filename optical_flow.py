@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+
+
+class OpticalFlowDetector:
+    def __init__(self, detector, min_interval=1, max_interval=4, motion_scale=4.0, min_tracked_ratio=0.8,
+                 max_error=12.0):
+        self.detector = detector
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_scale = motion_scale
+        self.min_tracked_ratio = min_tracked_ratio
+        self.max_error = max_error
+        self.lk_params = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.profiler = None
+        self.previous_gray = None
+        self.points = None
+        self.interval = max_interval
+        self.frames_since_keyframe = 0
+        self.keyframes = 0
+        self.propagated_frames = 0
+
+    def detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        if self.points is not None and self.frames_since_keyframe < self.interval - 1:
+            points = self.propagate(gray)
+            if points is not None:
+                self.previous_gray = gray
+                self.points = points
+                self.frames_since_keyframe += 1
+                self.propagated_frames += 1
+                return points.copy()
+
+        return self.keyframe(image, gray)
+
+    def keyframe(self, image, gray):
+        self.detector.profiler = self.profiler
+        points = self.detector.detect(image)
+        self.previous_gray = gray if points is not None else None
+        self.points = points
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        return None if points is None else points.copy()
+
+    def propagate(self, gray):
+        previous = self.points[:, :2].astype(np.float32).reshape(-1, 1, 2)
+        tracked, status, error = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, previous, None, **self.lk_params)
+        status = status.ravel().astype(bool)
+        error = error.ravel()
+
+        # Low confidence: too many points lost or badly matched, so force a FaceMesh keyframe
+        good = status & (error < self.max_error)
+        if good.mean() < self.min_tracked_ratio:
+            return None
+
+        tracked = tracked.reshape(-1, 2)
+        displacement = tracked[good] - previous.reshape(-1, 2)[good]
+        motion = float(np.median(np.linalg.norm(displacement, axis=1)))
+
+        points = self.points.copy()
+        # Points that failed to track move with the median flow of the ones that did
+        points[good, :2] = tracked[good]
+        points[~good, :2] += np.median(displacement, axis=0)
+        self.adapt_interval(motion)
+        return points
+
+    def adapt_interval(self, motion):
+        # Fast head motion refreshes with FaceMesh more often; a still head coasts on optical flow
+        interval = self.max_interval / (1.0 + motion / self.motion_scale)
+        self.interval = int(np.clip(round(interval), self.min_interval, self.max_interval))
+
+    def reset(self):
+        self.previous_gray = None
+        self.points = None
+        self.frames_since_keyframe = 0
+        self.detector.reset()
+
+    def close(self):
+        self.detector.close()
@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+
+class HudOverlay:
+    def __init__(self, origin=(30, 30), line_spacing=30, font_scale=1, color=(0, 255, 255), thickness=2):
+        self.origin = origin
+        self.line_spacing = line_spacing
+        self.font_scale = font_scale
+        self.color = color
+        self.thickness = thickness
+        self.enabled = True
+        self.texts = None
+        self.frame_size = None
+        self.patch = None
+        self.render_count = 0
+
+    def render(self, texts, frame_width, frame_height):
+        x, y = self.origin
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        sizes = [cv2.getTextSize(text, font, self.font_scale, self.thickness) for text in texts]
+        text_width = max(size[0][0] for size in sizes)
+        descent = max(size[1] for size in sizes) + self.thickness
+
+        width = min(frame_width, x + text_width + self.thickness)
+        height = min(frame_height, y + self.line_spacing * (len(texts) - 1) + descent)
+        patch = np.zeros((height, width, 3), dtype=np.uint8)
+
+        for text in texts:
+            cv2.putText(patch, text, (x, y), font, self.font_scale, self.color, self.thickness, cv2.LINE_AA)
+            y += self.line_spacing
+
+        # Pre-mirror once so the text reads correctly in the flipped preview
+        self.patch = cv2.flip(patch, 1)
+        self.render_count += 1
+
+    def draw(self, image, texts):
+        if not self.enabled:
+            return
+
+        texts = tuple(texts)
+        frame_size = image.shape[:2]
+        # Texts are already formatted at display precision, so equal strings mean an identical patch
+        if texts != self.texts or frame_size != self.frame_size:
+            self.render(texts, image.shape[1], image.shape[0])
+            self.texts = texts
+            self.frame_size = frame_size
+
+        height, width = self.patch.shape[:2]
+        region = image[:height, image.shape[1] - width:]
+        np.copyto(region, self.patch, where=self.patch > 0)
@@ -0,0 +1,83 @@
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+TRACKING_STAGES = ['capture', 'convert', 'inference', 'gestures', 'display', 'dispatch']
+
+
+class StageProfiler:
+    def __init__(self, stages=TRACKING_STAGES, window=300, enabled=True):
+        self.enabled = enabled
+        self.samples = {stage: deque(maxlen=window) for stage in stages}
+        self.frame_starts = deque(maxlen=window)
+        self.last_mark = 0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.last_mark = time.perf_counter_ns()
+        self.frame_starts.append(self.last_mark)
+
+    def lap(self, stage):
+        # Time since the previous lap (or frame start) is charged to this stage
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self.samples[stage].append(now - self.last_mark)
+        self.last_mark = now
+
+    def record(self, stage, duration_ns):
+        if not self.enabled:
+            return
+        self.samples[stage].append(duration_ns)
+
+    def fps(self):
+        if len(self.frame_starts) < 2:
+            return 0.0
+        span = self.frame_starts[-1] - self.frame_starts[0]
+        return (len(self.frame_starts) - 1) * 1e9 / span if span else 0.0
+
+    def histogram(self, stage, bins=20):
+        samples = np.array(self.samples[stage], dtype=np.float64) / 1e6
+        if not len(samples):
+            return [], []
+        counts, edges = np.histogram(samples, bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def snapshot(self, bins=20):
+        stages = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.array(samples, dtype=np.float64) / 1e6
+            stages[stage] = {
+                'count': len(values),
+                'mean_ms': float(values.mean()),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'max_ms': float(values.max()),
+            }
+            counts, edges = self.histogram(stage, bins)
+            stages[stage]['histogram'] = {'counts': counts, 'edges_ms': edges}
+        return {'fps': self.fps(), 'stages': stages}
+
+    def export_json(self, path):
+        with open(path, 'w') as output:
+            json.dump(self.snapshot(), output, indent=2)
+
+    def export_csv(self, path):
+        snapshot = self.snapshot()
+        with open(path, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+            for stage, stats in snapshot['stages'].items():
+                writer.writerow([stage, stats['count'], stats['mean_ms'], stats['p50_ms'], stats['p95_ms'], stats['max_ms']])
+            writer.writerow(['fps', '', snapshot['fps'], '', '', ''])
+
+    def reset(self):
+        for samples in self.samples.values():
+            samples.clear()
+        self.frame_starts.clear()
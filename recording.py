@@ -0,0 +1,174 @@
+import json
+import os
+import time
+
+import numpy as np
+
+import features
+
+
+class SessionRecorder:
+    def __init__(self, path, max_frames=900, record_frames=True, record_landmarks=True):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_frames = max_frames
+        self.record_frames = record_frames
+        self.record_landmarks = record_landmarks
+        self.count = 0
+        self.frame_shape = None
+        self.frames = None
+        self.landmarks = None
+        self.timestamps = None
+        # Extra entries for meta.json, e.g. the targets shown during a pointing recording
+        self.metadata = {}
+
+    def _open(self, frame_shape):
+        self.frame_shape = frame_shape
+        open_memmap = np.lib.format.open_memmap
+        self.timestamps = open_memmap(os.path.join(self.path, 'timestamps.npy'), mode='w+',
+                                      dtype=np.float64, shape=(self.max_frames,))
+        if self.record_frames:
+            self.frames = open_memmap(os.path.join(self.path, 'frames.npy'), mode='w+',
+                                      dtype=np.uint8, shape=(self.max_frames,) + frame_shape)
+        if self.record_landmarks:
+            self.landmarks = open_memmap(os.path.join(self.path, 'landmarks.npy'), mode='w+',
+                                         dtype=np.float32, shape=(self.max_frames, len(features.TRACKED_INDICES), 3))
+            self.landmarks[:] = np.nan
+
+    def record(self, image, points, timestamp):
+        if self.count >= self.max_frames:
+            return False
+
+        if self.timestamps is None:
+            self._open(image.shape)
+
+        self.timestamps[self.count] = timestamp
+        if self.frames is not None:
+            self.frames[self.count] = image
+        if self.landmarks is not None and points is not None:
+            self.landmarks[self.count] = points
+        self.count += 1
+        return True
+
+    def close(self):
+        for array in (self.timestamps, self.frames, self.landmarks):
+            if array is not None:
+                array.flush()
+
+        meta = {
+            'count': self.count,
+            'frame_shape': list(self.frame_shape) if self.frame_shape else None,
+            'tracked_indices': features.TRACKED_INDICES,
+            'has_frames': self.frames is not None,
+            'has_landmarks': self.landmarks is not None,
+        }
+        meta.update(self.metadata)
+        with open(os.path.join(self.path, 'meta.json'), 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+
+class ReplaySource:
+    def __init__(self, path, realtime=False):
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+
+        self.meta = meta
+        # Only landmark replay cares about the layout; frames replay through any build
+        self.tracked_indices = meta['tracked_indices']
+        self.count = meta['count']
+        if self.count:
+            self.frame_shape = tuple(meta['frame_shape'])
+            self.timestamps = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')[:self.count]
+        else:
+            # The session ended before its first frame, so the recorder never created any arrays
+            self.frame_shape = None
+            self.timestamps = np.zeros(0)
+        self.frames = np.load(os.path.join(path, 'frames.npy'), mmap_mode='r') if meta['has_frames'] else None
+        self.landmarks = np.load(os.path.join(path, 'landmarks.npy'), mmap_mode='r') if meta['has_landmarks'] else None
+        self.realtime = realtime
+        self.position = -1
+        self.start_time = None
+        self.dropped_count = 0
+        self.exhausted = False
+        self.min_interval = 0.0
+        # Set by ReplayLandmarkDetector, the only detector that can work without the recorded pixels
+        self.blank_frames = False
+
+    def start(self):
+        self.position = -1
+        self.start_time = time.perf_counter()
+        self.exhausted = False
+
+    def read(self, timeout=1.0):
+        next_index = self.position + 1
+        if next_index >= self.count:
+            self.exhausted = True
+            return False, None, None
+
+        capture_time = time.perf_counter()
+        if self.realtime:
+            # Pace frames like the original camera and skip the ones a slow pipeline would have missed
+            offsets = self.timestamps - self.timestamps[0]
+            elapsed = capture_time - self.start_time
+            if elapsed < offsets[next_index]:
+                time.sleep(offsets[next_index] - elapsed)
+            else:
+                latest = min(int(np.searchsorted(offsets, elapsed, side='right')) - 1, self.count - 1)
+                self.dropped_count += latest - next_index
+                next_index = latest
+            capture_time = self.start_time + offsets[next_index]
+
+        self.position = next_index
+        return True, self.frame(next_index), capture_time
+
+    def replay_time(self, recorded_time):
+        # Maps a time from the recording session onto the clock realtime replay reports
+        return self.start_time + (recorded_time - self.timestamps[0])
+
+    def frame(self, index):
+        if self.frames is None:
+            if not self.blank_frames:
+                raise ValueError("Recording has no frames; replay its landmarks with ReplayLandmarkDetector")
+            return np.zeros(self.frame_shape, dtype=np.uint8)
+        return np.array(self.frames[index])
+
+    def current_landmarks(self):
+        if self.landmarks is None or self.position < 0:
+            return None
+        points = np.array(self.landmarks[self.position], dtype=np.float64)
+        if np.isnan(points).any():
+            return None
+        return points
+
+    def stop(self):
+        pass
+
+
+class ReplayLandmarkDetector:
+    def __init__(self, source):
+        if source.landmarks is None:
+            raise ValueError("Recording has no landmarks to replay")
+        self.source = source
+        self.profiler = None
+        self.rows = None
+        if source.tracked_indices != features.TRACKED_INDICES:
+            # Older recordings may store the landmarks in another order or lack some of them
+            recorded = {index: row for row, index in enumerate(source.tracked_indices)}
+            missing = [index for index in features.TRACKED_INDICES if index not in recorded]
+            if missing:
+                raise ValueError(f"Recording lacks landmarks {missing}; replay its frames through FaceMesh instead")
+            self.rows = [recorded[index] for index in features.TRACKED_INDICES]
+        # Detection reads the recorded landmarks, so blank frames of the recorded size stand in for the pixels
+        source.blank_frames = True
+
+    def detect(self, image):
+        points = self.source.current_landmarks()
+        if points is not None and self.rows is not None:
+            points = points[self.rows]
+        return points
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
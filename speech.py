@@ -1,31 +1,376 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import speech_recognition as sr
+import json
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class RecognizerBackend:
+    streaming = False
+
+    def start_phrase(self, sample_rate, sample_width):
+        pass
+
+    def feed(self, chunk):
+        # Streaming backends return the partial transcript so far
+        return None
+
+    def finish_phrase(self, audio):
+        raise NotImplementedError
+
+
+class GoogleRecognizer(RecognizerBackend):
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def finish_phrase(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class VoskRecognizer(RecognizerBackend):
+    streaming = True
+    # Models are large and thread-safe, so dictation and command mode share one per path
+    models = {}
+
+    def __init__(self, model_path=None, grammar=None):
+        # Optional offline backend: pip install vosk
+        from vosk import KaldiRecognizer, Model
+        self.KaldiRecognizer = KaldiRecognizer
+        self.model = self.models.get(model_path)
+        if self.model is None:
+            self.model = self.models[model_path] = Model(model_path) if model_path else Model(lang='en-us')
+        # A restricted grammar turns the recognizer into a fast keyword spotter
+        self.grammar = json.dumps(grammar) if grammar is not None else None
+        self.recognizer = None
+        self.finished_text = []
+
+    def start_phrase(self, sample_rate, sample_width):
+        if self.grammar is not None:
+            self.recognizer = self.KaldiRecognizer(self.model, sample_rate, self.grammar)
+        else:
+            self.recognizer = self.KaldiRecognizer(self.model, sample_rate)
+        self.finished_text = []
+
+    def feed(self, chunk):
+        if self.recognizer.AcceptWaveform(chunk):
+            text = json.loads(self.recognizer.Result()).get('text', '')
+            if text:
+                self.finished_text.append(text)
+            return ' '.join(self.finished_text)
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        return ' '.join(self.finished_text + ([partial] if partial else []))
+
+    def finish_phrase(self, audio):
+        text = json.loads(self.recognizer.FinalResult()).get('text', '')
+        if text:
+            self.finished_text.append(text)
+        return ' '.join(self.finished_text)
+
+
+class ScriptedRecognizer(RecognizerBackend):
+    streaming = True
+
+    def __init__(self, phrases, chunks_per_word=2):
+        self.phrases = deque(phrases)
+        self.chunks_per_word = chunks_per_word
+        self.words = []
+        self.chunks = 0
+
+    def start_phrase(self, sample_rate, sample_width):
+        self.words = self.phrases.popleft().split() if self.phrases else []
+        self.chunks = 0
+
+    def feed(self, chunk):
+        self.chunks += 1
+        return ' '.join(self.words[:self.chunks // self.chunks_per_word])
+
+    def finish_phrase(self, audio):
+        if not self.words:
+            raise sr.UnknownValueError()
+        return ' '.join(self.words)
+
+
+def create_recognizer(name, **options):
+    if name == 'google':
+        return GoogleRecognizer()
+    if name == 'vosk':
+        return VoskRecognizer(options.get('model_path') or None, options.get('grammar'))
+    raise ValueError(f"Unknown speech recognizer: {name}")
+
+
+class EnergySegmenter:
+    def __init__(self, sample_rate, chunk_size, pause_threshold=0.8, phrase_time_limit=10,
+                 pre_roll=0.3, calibration_time=0.5, min_energy=300):
+        chunk_duration = chunk_size / sample_rate
+        self.pause_chunks = max(1, int(pause_threshold / chunk_duration))
+        self.limit_chunks = int(phrase_time_limit / chunk_duration)
+        self.calibration_chunks = int(calibration_time / chunk_duration)
+        self.pre_roll = deque(maxlen=max(1, int(pre_roll / chunk_duration)))
+        self.min_energy = min_energy
+        self.energy_threshold = min_energy
+        self.ambient = []
+        self.in_phrase = False
+        self.phrase_chunks = 0
+        self.silent_chunks = 0
+        self.last_voiced = None
+
+    def process(self, chunk, timestamp):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+        # Learn the room's noise floor before segmenting anything
+        if len(self.ambient) < self.calibration_chunks:
+            self.ambient.append(energy)
+            self.energy_threshold = max(self.min_energy, 1.5 * float(np.mean(self.ambient)))
+            return []
+
+        voiced = energy > self.energy_threshold
+        if voiced:
+            self.last_voiced = timestamp
+        if not self.in_phrase:
+            self.pre_roll.append(chunk)
+            if not voiced:
+                return []
+            self.in_phrase = True
+            self.phrase_chunks = len(self.pre_roll)
+            self.silent_chunks = 0
+            events = [('start', timestamp)] + [('audio', buffered) for buffered in self.pre_roll]
+            self.pre_roll.clear()
+            return events
+
+        self.phrase_chunks += 1
+        self.silent_chunks = 0 if voiced else self.silent_chunks + 1
+        events = [('audio', chunk)]
+        if self.silent_chunks >= self.pause_chunks or self.phrase_chunks >= self.limit_chunks:
+            self.in_phrase = False
+            events.append(('end', timestamp))
+        return events
+
 
 class SpeechToText(QThread):
     textReady = pyqtSignal(str)
+    partialTextReady = pyqtSignal(str)
     errorOccurred = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, recognizer=None):
         super().__init__()
         self.listening = True
+        self.recognizer = recognizer if recognizer is not None else GoogleRecognizer()
+        self.pause_threshold = 0.8
+        self.phrase_time_limit = 10
+        self.first_word_latencies = deque(maxlen=50)
+        self.final_latencies = deque(maxlen=50)
 
     def run(self):
-        r = sr.Recognizer()
-        with sr.Microphone() as source:
-            r.pause_threshold = 0.8
-            while self.listening:
-                try:
-                    print("Listening for speech...")
-                    audio = r.listen(source, timeout=None, phrase_time_limit=10)
+        audio_chunks = queue.Queue()
+        phrase_events = queue.Queue()
+        stages = []
+
+        try:
+            with sr.Microphone() as source:
+                stages = [
+                    threading.Thread(target=self.segment_audio, daemon=True,
+                                     args=(audio_chunks, phrase_events, source.SAMPLE_RATE, source.CHUNK)),
+                    threading.Thread(target=self.recognize_phrases, daemon=True,
+                                     args=(phrase_events, source.SAMPLE_RATE, source.SAMPLE_WIDTH)),
+                ]
+                for stage in stages:
+                    stage.start()
+                print("Listening for speech...")
+                self.capture_audio(source, audio_chunks)
+        except Exception as e:
+            self.errorOccurred.emit(f"An error occurred: {str(e)}")
+        finally:
+            audio_chunks.put(None)
+
+        for stage in stages:
+            stage.join()
+        print(f"Speech latency report: {self.latency_report()}")
+
+    def capture_audio(self, source, audio_chunks):
+        # Capture only reads the microphone, so speech is never missed while a phrase is being recognized
+        while self.listening:
+            chunk = source.stream.read(source.CHUNK)
+            audio_chunks.put((time.perf_counter(), chunk))
+
+    def segment_audio(self, audio_chunks, phrase_events, sample_rate, chunk_size):
+        segmenter = EnergySegmenter(sample_rate, chunk_size, self.pause_threshold, self.phrase_time_limit)
+        while True:
+            item = audio_chunks.get()
+            if item is None:
+                break
+            timestamp, chunk = item
+            for event in segmenter.process(chunk, timestamp):
+                phrase_events.put(event)
+
+        if segmenter.in_phrase:
+            phrase_events.put(('end', time.perf_counter()))
+        phrase_events.put(None)
+
+    def recognize_phrases(self, phrase_events, sample_rate, sample_width):
+        chunks = []
+        onset = None
+        first_word_time = None
+        last_partial = ''
+
+        while True:
+            event = phrase_events.get()
+            if event is None:
+                break
+            kind, payload = event
+
+            if kind == 'start':
+                chunks = []
+                onset = payload
+                first_word_time = None
+                last_partial = ''
+                self.recognizer.start_phrase(sample_rate, sample_width)
+
+            elif kind == 'audio':
+                chunks.append(payload)
+                if self.recognizer.streaming:
                     try:
-                        text = r.recognize_google(audio)
-                        self.textReady.emit(text)
-                    except sr.UnknownValueError:
-                        print("No speech detected, continuing...")
-                    except sr.RequestError as e:
-                        self.errorOccurred.emit(f"Could not request results from Google Speech Recognition service; {e}")
+                        partial = self.recognizer.feed(payload)
+                    except Exception as e:
+                        self.errorOccurred.emit(f"An error occurred: {str(e)}")
+                        continue
+                    if partial and partial != last_partial:
+                        last_partial = partial
+                        if first_word_time is None:
+                            first_word_time = time.perf_counter()
+                        self.partialTextReady.emit(partial)
+
+            elif kind == 'end':
+                audio = sr.AudioData(b''.join(chunks), sample_rate, sample_width)
+                try:
+                    text = self.recognizer.finish_phrase(audio)
+                except sr.UnknownValueError:
+                    print("No speech detected, continuing...")
+                    continue
+                except sr.RequestError as e:
+                    self.errorOccurred.emit(f"Could not request results from Google Speech Recognition service; {e}")
+                    continue
                 except Exception as e:
                     self.errorOccurred.emit(f"An error occurred: {str(e)}")
+                    continue
+
+                if not text:
+                    continue
+                now = time.perf_counter()
+                if first_word_time is None:
+                    first_word_time = now
+                self.first_word_latencies.append(first_word_time - onset)
+                self.final_latencies.append(now - payload)
+                print(f"First word latency: {(first_word_time - onset) * 1000:.0f} ms")
+                self.textReady.emit(text)
+
+    def latency_report(self):
+        report = {}
+        for name, samples in (('first_word', self.first_word_latencies), ('end_of_speech', self.final_latencies)):
+            if samples:
+                values = np.array(samples) * 1000
+                report[f'{name}_ms_p50'] = float(np.percentile(values, 50))
+                report[f'{name}_ms_p95'] = float(np.percentile(values, 95))
+        return report
+
+    def stopListening(self):
+        self.listening = False
+
+
+VOICE_COMMANDS = {
+    'click': 'left_click',
+    'right click': 'right_click',
+    'double click': 'double_click',
+    'scroll up': 'scroll_up',
+    'scroll down': 'scroll_down',
+    'scroll mode': 'toggle_scroll_mode',
+    'start tracking': 'start_tracking',
+    'stop tracking': 'stop_tracking',
+    'pause tracking': 'pause_tracking',
+    'resume tracking': 'resume_tracking',
+    'calibrate': 'calibrate_pointer',
+}
+
+
+class CommandListener(QThread):
+    commandRecognized = pyqtSignal(str)
+    errorOccurred = pyqtSignal(str)
+
+    def __init__(self, recognizer=None, model_path=None, commands=None):
+        super().__init__()
+        self.listening = True
+        self.commands = commands if commands is not None else VOICE_COMMANDS
+        self.recognizer = recognizer
+        self.model_path = model_path
+        self.sample_rate = 16000
+        self.chunk_size = 480  # 30 ms, so a command is seen soon after it is spoken
+        self.pause_threshold = 0.3
+        self.command_latencies = deque(maxlen=50)
+
+    def match(self, text, final):
+        words = text.split()
+        # Anything outside the grammar means the speaker said something else around the command words
+        if '[unk]' in words:
+            return None
+        phrase = ' '.join(words)
+        if phrase not in self.commands:
+            return None
+        # A partial that is also the start of a longer command has to wait for the final result
+        if not final and any(other.startswith(phrase + ' ') for other in self.commands):
+            return None
+        return phrase
+
+    def run(self):
+        try:
+            if self.recognizer is None:
+                # Vosk is the only local backend; the grammar keeps decoding to the command words
+                self.recognizer = VoskRecognizer(self.model_path or None, list(self.commands) + ['[unk]'])
+            with sr.Microphone(sample_rate=self.sample_rate, chunk_size=self.chunk_size) as source:
+                self.listen(source)
+        except Exception as e:
+            self.errorOccurred.emit(f"An error occurred: {str(e)}")
+        print(f"Voice command latency report: {self.latency_report()}")
+
+    def listen(self, source):
+        # Only voiced segments reach the recognizer, so silence costs an RMS per chunk
+        segmenter = EnergySegmenter(source.SAMPLE_RATE, source.CHUNK, self.pause_threshold, phrase_time_limit=3)
+        print("Listening for voice commands...")
+        while self.listening:
+            chunk = source.stream.read(source.CHUNK)
+            captured = time.perf_counter()
+            for kind, payload in segmenter.process(chunk, captured):
+                if kind == 'start':
+                    self.recognizer.start_phrase(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                elif kind == 'audio':
+                    self.handle(self.recognizer.feed(payload), segmenter.last_voiced, False, source)
+                else:
+                    try:
+                        text = self.recognizer.finish_phrase(None)
+                    except sr.UnknownValueError:
+                        continue
+                    self.handle(text, segmenter.last_voiced, True, source)
+
+    def handle(self, text, spoken, final, source):
+        phrase = self.match(text or '', final)
+        if phrase is None:
+            return
+        # Measured from the last voiced chunk, so the trailing pause before a final result counts too
+        self.command_latencies.append(time.perf_counter() - spoken)
+        print(f"Voice command: {phrase}")
+        self.commandRecognized.emit(self.commands[phrase])
+        # Start over so the same words are not matched again and repeated commands still work
+        self.recognizer.start_phrase(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def latency_report(self):
+        report = {}
+        if self.command_latencies:
+            values = np.array(self.command_latencies) * 1000
+            report['command_ms_p50'] = float(np.percentile(values, 50))
+            report['command_ms_p95'] = float(np.percentile(values, 95))
+        return report
 
     def stopListening(self):
-        self.listening = False
\ No newline at end of file
+        self.listening = False
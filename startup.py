@@ -0,0 +1,40 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class TrackerPrewarm(QThread):
+    ready = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self.session = None
+
+    def run(self):
+        # Heavy imports (cv2, mediapipe and its dependencies) happen here instead of before the window appears
+        try:
+            import numpy as np
+            import face_tracking  # noqa: F401
+            from tracking_session import TrackingSession
+
+            tracking = self.config.section('TRACKING')
+            width, height = tracking['capture_width'], tracking['capture_height']
+
+            self.session = TrackingSession(resolution=(width, height), release_after=tracking['release_camera_after'])
+            self.session.open_camera()
+            self.session.park()  # Keep the camera open but barely decode until tracking starts
+
+            if tracking['inference_process']:
+                from inference_worker import ProcessDetector
+                self.session.detector = ProcessDetector(roi_cropping=tracking['roi_cropping'])
+                self.session.detector.start((height, width, 3))
+            else:
+                from detector import FaceMeshDetector
+                self.session.detector = FaceMeshDetector(roi_cropping=tracking['roi_cropping'])
+                # The first inference initializes the model graph
+                self.session.detector.detect(np.zeros((height, width, 3), dtype=np.uint8))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        self.ready.emit()
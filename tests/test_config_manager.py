@@ -0,0 +1,144 @@
+import configparser
+import os
+import stat
+import time
+
+import pytest
+
+from config_manager import SCHEMA, ConfigManager, Setting
+
+
+def counting_saves(manager):
+    saves = []
+    save_config = manager.save_config
+
+    def save():
+        saves.append(time.perf_counter())
+        save_config()
+    # schedule_save looks the method up on the instance, so the timer calls the wrapper
+    manager.save_config = save
+    return saves
+
+
+def read_ini(path):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+def test_setting_parse_converts_strings():
+    assert Setting(int, 3, 1, 10).parse(' 7 ') == 7
+    assert Setting(float, 0.2, 0.0, 1.0).parse('0.5') == 0.5
+    assert Setting(bool, True).parse('Off') is False
+    assert Setting(bool, False).parse('yes') is True
+    assert Setting(str, 'one_euro', choices=['one_euro', 'kalman']).parse('kalman') == 'kalman'
+    assert Setting(int, 3, 1, 10).parse(4.0) == 4
+
+
+@pytest.mark.parametrize('setting, value', [
+    (Setting(int, 3, 1, 10), 'three'),
+    (Setting(int, 3, 1, 10), '0'),
+    (Setting(int, 3, 1, 10), '11'),
+    (Setting(float, 0.2, 0.0, 1.0), '-0.1'),
+    (Setting(bool, True), 'maybe'),
+    (Setting(str, 'one_euro', choices=['one_euro', 'kalman']), 'median'),
+])
+def test_setting_parse_rejects_invalid_values(setting, value):
+    with pytest.raises(ValueError):
+        setting.parse(value)
+
+
+def test_defaults_are_written_for_a_new_file(tmp_path):
+    path = tmp_path / 'config.ini'
+    manager = ConfigManager(str(path))
+
+    assert manager.get('TRACKING', 'sensitivity') == SCHEMA['TRACKING']['sensitivity'].default
+    assert read_ini(path)['GESTURES']['long_blink'] == 'none'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+def test_invalid_values_in_the_file_fall_back_to_defaults(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[TRACKING]\nsensitivity = eleven\nblink_threshold = 0.3\n')
+    manager = ConfigManager(str(path))
+
+    assert manager.get('TRACKING', 'sensitivity') == 3
+    assert manager.get('TRACKING', 'blink_threshold') == 0.3
+
+
+def test_set_value_rejects_invalid_values_without_saving(tmp_path):
+    manager = ConfigManager(str(tmp_path / 'config.ini'), save_delay=0.05)
+    version = manager.version
+    saves = counting_saves(manager)
+
+    with pytest.raises(ValueError):
+        manager.set_value('TRACKING', 'sensitivity', '99')
+    time.sleep(0.2)
+
+    assert manager.get('TRACKING', 'sensitivity') == 3
+    assert manager.version == version
+    assert saves == []
+
+
+def test_burst_of_changes_is_written_once(tmp_path):
+    path = tmp_path / 'config.ini'
+    manager = ConfigManager(str(path), save_delay=0.1)
+    saves = counting_saves(manager)
+
+    for value in range(1, 11):
+        manager.set_value('TRACKING', 'sensitivity', value)
+    assert saves == []
+    time.sleep(0.5)
+
+    assert len(saves) == 1
+    assert read_ini(path)['TRACKING']['sensitivity'] == '10'
+
+
+def test_flush_writes_pending_changes_immediately(tmp_path):
+    path = tmp_path / 'config.ini'
+    manager = ConfigManager(str(path), save_delay=60.0)
+    saves = counting_saves(manager)
+
+    manager.set_value('SPEECH', 'recognizer', 'vosk')
+    assert read_ini(path)['SPEECH']['recognizer'] == 'google'
+    manager.flush()
+
+    assert len(saves) == 1
+    assert read_ini(path)['SPEECH']['recognizer'] == 'vosk'
+    # Nothing pending, nothing written
+    manager.flush()
+    assert len(saves) == 1
+
+
+def test_save_replaces_the_file_and_keeps_its_mode(tmp_path):
+    path = tmp_path / 'config.ini'
+    manager = ConfigManager(str(path), save_delay=60.0)
+    os.chmod(path, 0o640)
+    inode = os.stat(path).st_ino
+
+    manager.set_value('TRACKING', 'scroll_speed', '35')
+    manager.flush()
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    # Replaced rather than rewritten in place, and no temporary file is left behind
+    assert os.stat(path).st_ino != inode
+    assert os.listdir(tmp_path) == ['config.ini']
+    assert read_ini(path)['TRACKING']['scroll_speed'] == '35.0'
+
+
+def test_snapshot_version_changes_only_with_the_values(tmp_path):
+    manager = ConfigManager(str(tmp_path / 'config.ini'), save_delay=60.0)
+    first = manager.snapshot()
+    assert manager.snapshot() is first
+
+    # Setting a value to what it already is does not wake up hot reload
+    manager.set_value('TRACKING', 'sensitivity', 3)
+    assert manager.snapshot() is first
+
+    manager.set_value('TRACKING', 'sensitivity', 5)
+    second = manager.snapshot()
+    assert second.version > first.version
+    assert second.get('TRACKING', 'sensitivity') == 5
+    # Earlier snapshots are copies, so a tracker still holding one sees consistent values
+    assert first.get('TRACKING', 'sensitivity') == 3
+    manager.flush()
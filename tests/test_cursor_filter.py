@@ -0,0 +1,40 @@
+from cursor_filter import AbsolutePointer, PassthroughFilter
+
+
+def pointer():
+    return AbsolutePointer((1001, 501), yaw_range=20.0, pitch_range=10.0, position_filter=PassthroughFilter(),
+                           calibration_frames=3, origin=(-1001, 0))
+
+
+def test_calibration_centres_the_neutral_pose():
+    absolute = pointer()
+    assert absolute.update((5.0, 2.0), 0.0) is None
+    assert absolute.update((5.0, 2.0), 0.1) is None
+    # The origin places the desktop left of the primary screen
+    assert absolute.update((5.0, 2.0), 0.2) == (-501, 250)
+    assert absolute.update((25.0, -8.0), 0.3) == (-1, 0)
+    assert absolute.update((60.0, 40.0), 0.4) == (-1, 500)
+
+
+def test_reset_keeps_the_calibration():
+    absolute = pointer()
+    for step in range(3):
+        absolute.update((5.0, 2.0), step * 0.1)
+
+    # Resuming while looking at a corner must not make that corner the new centre
+    absolute.reset()
+    assert absolute.update((25.0, 12.0), 1.0) == (-1, 500)
+
+    absolute.calibrate()
+    for step in range(2):
+        assert absolute.update((25.0, 12.0), 2.0 + step * 0.1) is None
+    assert absolute.update((25.0, 12.0), 2.2) == (-501, 250)
+
+
+def test_reset_restarts_an_unfinished_calibration():
+    absolute = pointer()
+    absolute.update((30.0, 30.0), 0.0)
+    absolute.reset()
+    for step in range(2):
+        assert absolute.update((0.0, 0.0), 1.0 + step * 0.1) is None
+    assert absolute.update((0.0, 0.0), 1.2) == (-501, 250)
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+from gestures import GESTURE_BINDINGS, GestureEngine, default_gestures
+
+SETTINGS = {
+    'blink_threshold': 0.2,
+    'blink_duration': 0.3,
+    'blink_hysteresis': 0.02,
+    'long_blink_duration': 1.0,
+    'mouth_open_threshold': 30,
+    'mouth_open_duration': 0.5,
+    'mouth_open_hysteresis': 3.0,
+    'tilt_threshold': 10.0,
+    'tilt_hysteresis': 2.0,
+}
+
+OPEN = {'left_ear': 0.3, 'right_ear': 0.3, 'mouth_opening': 10.0, 'tilt_angle': 0.0}
+
+
+def engine(**bindings):
+    return GestureEngine(default_gestures(SETTINGS, dict(GESTURE_BINDINGS, **bindings)))
+
+
+def run(gesture_engine, frames, modes=()):
+    # frames: (timestamp, feature overrides); returns (timestamp, action, phase, value)
+    events = []
+    for timestamp, values in frames:
+        frame = SimpleNamespace(**dict(OPEN, **values))
+        for action, phase, value in gesture_engine.update(frame, timestamp, modes):
+            events.append((timestamp, action, phase, value))
+    return events
+
+
+def blink(start, length, feature='left_ear', value=0.1, step=0.1):
+    frames = []
+    timestamp = start
+    while timestamp < start + length:
+        frames.append((round(timestamp, 3), {feature: value}))
+        timestamp += step
+    frames.append((round(start + length, 3), {}))
+    return frames
+
+
+def test_unbound_gestures_are_dropped():
+    names = [gesture.name for gesture in engine().gestures]
+    assert 'long_blink' not in names
+    assert names == ['left_blink', 'right_blink', 'mouth_open', 'head_tilt']
+
+
+def test_blink_clicks_on_release_after_min_duration():
+    gestures = engine()
+    assert run(gestures, blink(0.0, 0.2)) == []
+    assert run(gestures, blink(1.0, 0.5)) == [(1.5, 'left_click', 'fire', None)]
+    assert run(gestures, blink(2.0, 0.5, feature='right_ear')) == [(2.5, 'right_click', 'fire', None)]
+
+
+def test_long_left_blink_still_clicks_without_a_long_blink_binding():
+    assert run(engine(), blink(0.0, 2.0)) == [(2.0, 'left_click', 'fire', None)]
+
+
+def test_long_blink_drag_holds_and_releases():
+    gestures = engine(long_blink='drag')
+    events = run(gestures, blink(0.0, 2.0))
+    # The drag starts once the blink has lasted long_blink_duration and the long blink does not also click
+    assert [(action, phase) for _, action, phase, _ in events] == [('drag', 'start'), ('drag', 'end')]
+    assert events[0][0] == 1.0
+    assert events[1][0] == 2.0
+
+    # A short blink is still a click
+    assert run(gestures, blink(3.0, 0.5)) == [(3.5, 'left_click', 'fire', None)]
+
+
+def test_reset_ends_a_held_drag():
+    gestures = engine(long_blink='drag')
+    frames = blink(0.0, 1.5)[:-1]
+    assert [(action, phase) for _, action, phase, _ in run(gestures, frames)] == [('drag', 'start')]
+    assert gestures.reset() == [('drag', 'end', None)]
+    assert gestures.reset() == []
+
+
+def test_hysteresis_keeps_a_blink_through_threshold_jitter():
+    gestures = engine()
+    frames = [(0.0, {'left_ear': 0.1}), (0.2, {'left_ear': 0.21}), (0.4, {'left_ear': 0.19}),
+              (0.6, {'left_ear': 0.25})]
+    # 0.21 is above the threshold but inside the margin, so this is one 0.6 s blink, not two short ones
+    assert run(gestures, frames) == [(0.6, 'left_click', 'fire', None)]
+
+
+def test_mouth_open_double_clicks():
+    gestures = engine()
+    frames = [(0.0, {'mouth_opening': 40.0}), (0.3, {'mouth_opening': 28.0}), (0.6, {'mouth_opening': 20.0})]
+    assert run(gestures, frames) == [(0.6, 'double_click', 'fire', None)]
+
+
+def test_head_tilt_scrolls_only_in_scroll_mode_after_baseline():
+    gestures = engine()
+    tilted = [(i * 0.1, {'tilt_angle': 15.0}) for i in range(5)]
+    assert run(gestures, tilted) == []
+
+    neutral = [(i * 0.1, {'tilt_angle': 2.0}) for i in range(30)]
+    assert run(gestures, neutral, modes=('scroll',)) == []
+    assert gestures.baseline('tilt_angle') == 2.0
+
+    events = run(gestures, [(3.0, {'tilt_angle': 17.0}), (3.1, {'tilt_angle': -13.0})], modes=('scroll',))
+    assert [(action, phase) for _, action, phase, _ in events] == [('scroll', 'fire'), ('scroll', 'fire')]
+    assert events[0][3] == 5.0
+    assert events[1][3] == -5.0
@@ -0,0 +1,89 @@
+import threading
+
+from input_dispatch import InputDispatcher, RecordingBackend
+
+
+class GatedBackend(RecordingBackend):
+    # Holds the first call until released, so the test controls what lands in one batch
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def move_rel(self, dx, dy):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(timeout=5.0)
+        super().move_rel(dx, dy)
+
+
+def test_coalesce_merges_adjacent_moves_only():
+    dispatcher = InputDispatcher(RecordingBackend())
+    batch = [(0.0, 'move_rel', (1, 2)), (0.1, 'move_rel', (3, 4)),
+             (0.2, 'click', ('left',)),
+             (0.3, 'move_rel', (5, 6)),
+             (0.4, 'mouse_down', ('left',)),
+             (0.5, 'move_to', (10, 10)), (0.6, 'move_to', (20, 30)),
+             (0.7, 'scroll', (3,)),
+             (0.8, 'mouse_up', ('left',))]
+
+    merged = dispatcher.coalesce(batch)
+
+    assert [(action, args) for _, action, args in merged] == [
+        ('move_rel', (4, 6)),
+        ('click', ('left',)),
+        ('move_rel', (5, 6)),
+        ('mouse_down', ('left',)),
+        ('move_to', (20, 30)),
+        ('scroll', (3,)),
+        ('mouse_up', ('left',)),
+    ]
+    # A merged move keeps the oldest enqueue time, so its latency is not understated
+    assert merged[0][0] == 0.0
+    assert dispatcher.coalesced_count == 2
+
+
+def test_dispatch_keeps_order_across_a_batch():
+    backend = GatedBackend()
+    dispatcher = InputDispatcher(backend)
+    dispatcher.start()
+
+    dispatcher.move_rel(1, 1)
+    assert backend.entered.wait(timeout=5.0)
+    # Everything posted while the backend is busy is dispatched as one batch
+    dispatcher.move_rel(2, 0)
+    dispatcher.move_rel(0, 3)
+    dispatcher.mouse_down()
+    dispatcher.move_rel(4, 4)
+    dispatcher.move_rel(1, 1)
+    dispatcher.mouse_up()
+    dispatcher.scroll(-5)
+    dispatcher.click(button='right')
+    backend.release.set()
+    dispatcher.stop()
+
+    assert backend.events == [
+        ('move_rel', 1, 1),
+        ('move_rel', 2, 3),
+        ('mouse_down', 'left'),
+        ('move_rel', 5, 5),
+        ('mouse_up', 'left'),
+        ('scroll', -5),
+        ('click', 'right'),
+    ]
+
+
+def test_stop_drains_the_queue():
+    backend = RecordingBackend()
+    dispatcher = InputDispatcher(backend)
+    for _ in range(100):
+        dispatcher.move_rel(1, 0)
+    dispatcher.click()
+    dispatcher.double_click()
+    dispatcher.start()
+    dispatcher.stop()
+
+    assert not dispatcher.is_alive()
+    assert dispatcher.queue_depth() == 0
+    assert backend.events == [('move_rel', 100, 0), ('click', 'left'), ('double_click',)]
+    assert dispatcher.metrics()['dispatched'] == 3
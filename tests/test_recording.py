@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pytest
+
+import features
+from recording import ReplayLandmarkDetector, ReplaySource, SessionRecorder
+
+FRAME_SHAPE = (48, 64, 3)
+
+
+def synthetic_points(index):
+    # A face-sized cloud drifting right by a pixel per frame
+    rng = np.random.default_rng(0)
+    points = rng.random((len(features.TRACKED_INDICES), 3)) * 20 + (20, 12, 0)
+    points[:, 0] += index
+    return points
+
+
+def record_clip(path, count, record_frames=False, face_every=1):
+    recorder = SessionRecorder(str(path), max_frames=count + 10, record_frames=record_frames)
+    for index in range(count):
+        image = np.full(FRAME_SHAPE, index, dtype=np.uint8)
+        points = synthetic_points(index) if index % face_every == 0 else None
+        recorder.record(image, points, 100.0 + index / 30)
+    recorder.close()
+    return recorder
+
+
+def test_replay_returns_what_was_recorded(tmp_path):
+    record_clip(tmp_path, 5, record_frames=True, face_every=2)
+    source = ReplaySource(str(tmp_path))
+    source.start()
+
+    for index in range(5):
+        success, image, _ = source.read()
+        assert success
+        assert image.shape == FRAME_SHAPE
+        assert image[0, 0, 0] == index
+        points = source.current_landmarks()
+        if index % 2 == 0:
+            np.testing.assert_allclose(points, synthetic_points(index), rtol=1e-5)
+        else:
+            assert points is None
+
+    assert source.read() == (False, None, None)
+    assert source.exhausted
+
+
+def test_frameless_clip_needs_the_landmark_detector(tmp_path):
+    record_clip(tmp_path, 3)
+    source = ReplaySource(str(tmp_path))
+    source.start()
+    with pytest.raises(ValueError):
+        source.read()
+
+    detector = ReplayLandmarkDetector(source)
+    source.start()
+    success, image, _ = source.read()
+    assert success
+    assert image.shape == FRAME_SHAPE
+    np.testing.assert_allclose(detector.detect(image), synthetic_points(0), rtol=1e-5)
+
+
+def test_landmarks_are_remapped_for_older_layouts(tmp_path):
+    record_clip(tmp_path, 1)
+    # Pretend the clip came from a build that stored the same landmarks in reverse order
+    meta_path = tmp_path / 'meta.json'
+    meta = json.loads(meta_path.read_text())
+    meta['tracked_indices'] = list(reversed(features.TRACKED_INDICES))
+    meta_path.write_text(json.dumps(meta))
+
+    source = ReplaySource(str(tmp_path))
+    detector = ReplayLandmarkDetector(source)
+    source.start()
+    _, image, _ = source.read()
+    np.testing.assert_allclose(detector.detect(image), synthetic_points(0)[::-1], rtol=1e-5)
+
+
+def test_empty_clip_replays_nothing(tmp_path):
+    SessionRecorder(str(tmp_path)).close()
+    source = ReplaySource(str(tmp_path))
+    source.start()
+
+    assert source.count == 0
+    assert source.read() == (False, None, None)
+    assert source.exhausted
+
+
+def test_record_replay_benchmark_round_trip(tmp_path):
+    # The full tracker pulls in the GUI and vision stack
+    pytest.importorskip('cv2')
+    pytest.importorskip('mediapipe')
+    pytest.importorskip('PyQt5')
+    import benchmark
+
+    clip = tmp_path / 'clip'
+    record_clip(clip, 60)
+    summary_path = tmp_path / 'summary.json'
+
+    assert benchmark.main(['replay', str(clip), '--landmarks-only', '--json', str(summary_path)]) == 0
+    summary = json.loads(summary_path.read_text())
+    assert summary['frames'] == 60
+    assert summary['frames_dropped'] == 0
+    assert {'capture', 'inference', 'gestures'} <= set(summary['stages'])
+
+    # Without --landmarks-only a frameless clip is refused rather than replayed as black frames
+    assert benchmark.main(['replay', str(clip)]) == 1
+
+    empty = tmp_path / 'empty'
+    SessionRecorder(str(empty)).close()
+    assert benchmark.main(['replay', str(empty), '--landmarks-only']) == 1
@@ -0,0 +1,152 @@
+import queue
+
+import numpy as np
+
+from speech import CommandListener, EnergySegmenter, ScriptedRecognizer, SpeechToText
+
+SAMPLE_RATE = 16000
+CHUNK_SIZE = 480  # 30 ms
+SILENCE = np.zeros(CHUNK_SIZE, dtype=np.int16).tobytes()
+VOICE = np.full(CHUNK_SIZE, 2000, dtype=np.int16).tobytes()
+
+
+def timed(chunks, start=0.0):
+    return [(start + i * CHUNK_SIZE / SAMPLE_RATE, chunk) for i, chunk in enumerate(chunks)]
+
+
+def test_segmenter_calibrates_then_emits_one_phrase():
+    segmenter = EnergySegmenter(SAMPLE_RATE, CHUNK_SIZE, pause_threshold=0.3, pre_roll=0.09)
+    # 0.5 s of calibration, then a short lead-in, 10 voiced chunks and a pause longer than pause_threshold
+    chunks = timed([SILENCE] * 16 + [SILENCE] * 5 + [VOICE] * 10 + [SILENCE] * 12)
+    events = []
+    for timestamp, chunk in chunks:
+        events.extend((timestamp, kind, payload) for kind, payload in segmenter.process(chunk, timestamp))
+
+    kinds = [kind for _, kind, _ in events]
+    assert kinds[0] == 'start'
+    assert kinds.count('start') == kinds.count('end') == 1
+    assert kinds.index('end') == len(kinds) - 1
+    # Pre-roll (two silent chunks plus the onset chunk), the rest of the speech, then the 0.3 s of trailing silence
+    assert kinds.count('audio') == 3 + 9 + 10
+    assert events[0][0] == chunks[21][0]
+    assert segmenter.last_voiced == chunks[30][0]
+    assert not segmenter.in_phrase
+
+
+def test_segmenter_cuts_phrases_at_the_time_limit():
+    segmenter = EnergySegmenter(SAMPLE_RATE, CHUNK_SIZE, pause_threshold=0.3, phrase_time_limit=0.6,
+                                calibration_time=0.0)
+    kinds = []
+    for timestamp, chunk in timed([VOICE] * 40):
+        kinds.extend(kind for kind, _ in segmenter.process(chunk, timestamp))
+    # Continuous speech is split into 0.6 s phrases of 20 chunks each
+    assert kinds == (['start'] + ['audio'] * 20 + ['end']) * 2
+
+
+def run_pipeline(listener, chunks):
+    audio_chunks = queue.Queue()
+    phrase_events = queue.Queue()
+    for item in chunks:
+        audio_chunks.put(item)
+    audio_chunks.put(None)
+    # The stages normally run on their own threads; draining the queues in order gives the same result
+    listener.segment_audio(audio_chunks, phrase_events, SAMPLE_RATE, CHUNK_SIZE)
+    listener.recognize_phrases(phrase_events, SAMPLE_RATE, 2)
+
+
+def test_pipeline_recognizes_each_phrase_once():
+    listener = SpeechToText(recognizer=ScriptedRecognizer(['hello there world', 'good bye']))
+    finals, partials = [], []
+    listener.textReady.connect(finals.append)
+    listener.partialTextReady.connect(partials.append)
+
+    phrase = [VOICE] * 10 + [SILENCE] * 30
+    run_pipeline(listener, timed([SILENCE] * 16 + phrase + phrase))
+
+    assert finals == ['hello there world', 'good bye']
+    assert partials == ['hello', 'hello there', 'hello there world', 'good', 'good bye']
+    report = listener.latency_report()
+    assert set(report) == {'first_word_ms_p50', 'first_word_ms_p95', 'end_of_speech_ms_p50', 'end_of_speech_ms_p95'}
+
+
+def test_pipeline_skips_phrases_without_words_and_flushes_at_shutdown():
+    listener = SpeechToText(recognizer=ScriptedRecognizer(['', 'still talking']))
+    finals = []
+    listener.textReady.connect(finals.append)
+
+    # The second phrase is cut off by the end of the stream rather than by a pause
+    run_pipeline(listener, timed([SILENCE] * 16 + [VOICE] * 10 + [SILENCE] * 30 + [VOICE] * 10))
+
+    assert finals == ['still talking']
+    assert len(listener.first_word_latencies) == 1
+
+
+class ChunkStream:
+    # Stands in for the microphone; stops the listener once the scripted audio runs out
+    def __init__(self, listener, chunks):
+        self.listener = listener
+        self.chunks = list(chunks)
+
+    def read(self, size):
+        if len(self.chunks) == 1:
+            self.listener.stopListening()
+        return self.chunks.pop(0)
+
+
+class ChunkSource:
+    SAMPLE_RATE = SAMPLE_RATE
+    CHUNK = CHUNK_SIZE
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, listener, chunks):
+        self.stream = ChunkStream(listener, chunks)
+
+
+def listen(phrases, chunks, commands=None):
+    listener = CommandListener(recognizer=ScriptedRecognizer(phrases), commands=commands)
+    actions = []
+    listener.commandRecognized.connect(actions.append)
+    listener.listen(ChunkSource(listener, chunks))
+    return listener, actions
+
+
+def test_command_match_rejects_unknown_words():
+    listener = CommandListener(recognizer=ScriptedRecognizer([]))
+    assert listener.match('click', False) == 'click'
+    assert listener.match('right click', True) == 'right click'
+    assert listener.match('[unk] click', True) is None
+    assert listener.match('click [unk]', False) is None
+    assert listener.match('scroll', True) is None
+    assert listener.match('', True) is None
+
+
+def test_command_match_holds_back_prefixes_of_longer_commands():
+    listener = CommandListener(recognizer=ScriptedRecognizer([]),
+                               commands={'scroll': 'toggle_scroll_mode', 'scroll up': 'scroll_up'})
+    assert listener.match('scroll', False) is None
+    assert listener.match('scroll', True) == 'scroll'
+    assert listener.match('scroll up', False) == 'scroll up'
+
+
+def test_partial_prefix_waits_for_the_longer_command():
+    commands = {'scroll': 'toggle_scroll_mode', 'scroll up': 'scroll_up'}
+    _, actions = listen(['scroll up'], [SILENCE] * 16 + [VOICE] * 10 + [SILENCE] * 12, commands)
+    assert actions == ['scroll_up']
+
+
+def test_prefix_command_fires_on_the_final_result():
+    commands = {'scroll': 'toggle_scroll_mode', 'scroll up': 'scroll_up'}
+    _, actions = listen(['scroll'], [SILENCE] * 16 + [VOICE] * 10 + [SILENCE] * 12, commands)
+    assert actions == ['toggle_scroll_mode']
+
+
+def test_repeated_command_fires_each_time():
+    # The recognizer restarts after a match, so "click click" in one breath is two clicks
+    listener, actions = listen(['click', 'click'], [SILENCE] * 16 + [VOICE] * 10 + [SILENCE] * 12)
+    assert actions == ['left_click', 'left_click']
+    assert len(listener.command_latencies) == 2
+
+
+def test_command_with_unknown_words_does_not_fire():
+    _, actions = listen(['[unk] click'], [SILENCE] * 16 + [VOICE] * 10 + [SILENCE] * 12)
+    assert actions == []
@@ -0,0 +1,43 @@
+from text_injection import RecordingTextBackend, TextInjector
+
+
+class NoClipboardBackend(RecordingTextBackend):
+    def paste(self, text):
+        raise RuntimeError("no clipboard")
+
+
+def test_choose_strategy():
+    injector = TextInjector(RecordingTextBackend(), paste_threshold=10)
+    assert injector.choose_strategy('hello') == 'keys'
+    assert injector.choose_strategy('a' * 9) == 'keys'
+    assert injector.choose_strategy('a' * 10) == 'paste'
+    assert injector.choose_strategy('café') == 'paste'
+
+
+def test_injection_keeps_order_and_strategy():
+    backend = RecordingTextBackend()
+    injector = TextInjector(backend, paste_threshold=10)
+    injector.start()
+    for text in ['one ', '', 'a much longer sentence ', 'naïve ', 'two']:
+        injector.inject(text)
+    injector.stop()
+
+    assert backend.events == [
+        ('keys', 'one '),
+        ('paste', 'a much longer sentence '),
+        ('paste', 'naïve '),
+        ('keys', 'two'),
+    ]
+    metrics = injector.metrics()
+    assert metrics['queue_depth'] == 0
+    assert metrics['injected_chars'] == len('one a much longer sentence naïve two')
+
+
+def test_failed_paste_falls_back_to_keys():
+    backend = NoClipboardBackend()
+    injector = TextInjector(backend, paste_threshold=4)
+    injector.start()
+    injector.inject('long enough')
+    injector.stop()
+
+    assert backend.events == [('keys', 'long enough')]
@@ -0,0 +1,105 @@
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+
+class PyAutoGuiTextBackend:
+    def __init__(self, paste_settle=0.05):
+        import pyautogui
+        import pyperclip
+        pyautogui.PAUSE = 0  # No sleep between key events
+        self.pyautogui = pyautogui
+        self.pyperclip = pyperclip
+        self.paste_settle = paste_settle
+        self.paste_modifier = 'command' if sys.platform == 'darwin' else 'ctrl'
+
+    def type_keys(self, text):
+        self.pyautogui.write(text, interval=0)
+
+    def paste(self, text):
+        previous = self.pyperclip.paste()
+        self.pyperclip.copy(text)
+        try:
+            self.pyautogui.hotkey(self.paste_modifier, 'v')
+            # Give the target application time to read the clipboard before it is restored
+            time.sleep(self.paste_settle)
+        finally:
+            self.pyperclip.copy(previous)
+
+
+class RecordingTextBackend:
+    def __init__(self):
+        self.events = []
+
+    def type_keys(self, text):
+        self.events.append(('keys', text))
+
+    def paste(self, text):
+        self.events.append(('paste', text))
+
+
+class TextInjector(threading.Thread):
+    def __init__(self, backend=None, paste_threshold=32):
+        super().__init__(daemon=True)
+        self.backend = backend
+        self.paste_threshold = paste_threshold
+        self.texts = queue.Queue()
+        self.throughput = deque(maxlen=50)
+        self.injected_chars = 0
+
+    def inject(self, text):
+        if text:
+            self.texts.put(text)
+
+    def queue_depth(self):
+        return self.texts.qsize()
+
+    def choose_strategy(self, text):
+        # Key events can only produce plain ASCII; long payloads are faster as a single paste
+        if len(text) >= self.paste_threshold or not text.isascii():
+            return 'paste'
+        return 'keys'
+
+    def run(self):
+        # pyautogui is slow to import, so the default backend is built on the worker thread
+        if self.backend is None:
+            self.backend = PyAutoGuiTextBackend()
+
+        while True:
+            text = self.texts.get()
+            if text is None:
+                break
+
+            strategy = self.choose_strategy(text)
+            started = time.perf_counter()
+            try:
+                if strategy == 'paste':
+                    try:
+                        self.backend.paste(text)
+                    except Exception as e:
+                        # Clipboard unavailable (e.g. no xclip on Linux); fall back to key events
+                        print(f"Clipboard paste failed, typing instead: {e}")
+                        strategy = 'keys'
+                if strategy == 'keys':
+                    self.backend.type_keys(text)
+            except Exception as e:
+                print(f"Text injection failed: {e}")
+                continue
+
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            self.throughput.append(len(text) / elapsed)
+            self.injected_chars += len(text)
+            print(f"Typed {len(text)} chars via {strategy} ({len(text) / elapsed:.0f} chars/s)")
+
+    def stop(self):
+        self.texts.put(None)
+        if self.is_alive():
+            self.join(timeout=2.0)
+
+    def metrics(self):
+        report = {'queue_depth': self.queue_depth(), 'injected_chars': self.injected_chars}
+        if self.throughput:
+            report['chars_per_second'] = sum(self.throughput) / len(self.throughput)
+        return report
@@ -0,0 +1,68 @@
+import threading
+
+from capture import FrameGrabber
+
+
+class TrackingSession:
+    def __init__(self, camera_index=0, resolution=(640, 480), detector=None, release_after=60.0):
+        self.camera_index = camera_index
+        self.resolution = resolution
+        self.detector = detector
+        self.release_after = release_after
+        self.frame_source = None
+        self.lock = threading.Lock()
+        self.release_timer = None
+
+    def open_camera(self):
+        with self.lock:
+            self._cancel_release()
+            if self.frame_source is None or not self.frame_source.running:
+                self.frame_source = FrameGrabber(self.camera_index, resolution=self.resolution)
+                self.frame_source.start()
+            self.frame_source.min_interval = 0.0
+            return self.frame_source
+
+    def configure(self, resolution, roi_cropping):
+        # Applied between runs: a new resolution needs a new grabber, the model only needs the new option
+        with self.lock:
+            source = None
+            if resolution != self.resolution:
+                self.resolution = resolution
+                source, self.frame_source = self.frame_source, None
+        if source is not None:
+            source.stop()
+        if self.detector is not None:
+            self.detector.configure(roi_cropping=roi_cropping)
+
+    def park(self):
+        # Keep the camera open but barely decoding; release it if nobody comes back in time
+        with self.lock:
+            if self.frame_source is not None:
+                self.frame_source.min_interval = 1.0
+            self._cancel_release()
+            if self.release_after > 0:
+                self.release_timer = threading.Timer(self.release_after, self.release_camera)
+                self.release_timer.daemon = True
+                self.release_timer.start()
+
+    def release_camera(self):
+        with self.lock:
+            source, self.frame_source = self.frame_source, None
+        if source is not None:
+            source.stop()
+            print("Camera released after idle timeout")
+
+    def _cancel_release(self):
+        if self.release_timer is not None:
+            self.release_timer.cancel()
+            self.release_timer = None
+
+    def close(self):
+        with self.lock:
+            self._cancel_release()
+            source, self.frame_source = self.frame_source, None
+        if source is not None:
+            source.stop()
+        if self.detector is not None:
+            self.detector.close()
+            self.detector = None